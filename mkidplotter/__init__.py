@@ -1,13 +1,15 @@
 # bring important mkidplotter functions and classes to the top level
 from mkidplotter.gui.results import Results
+from mkidplotter.gui.timeseries import TimeSeries, TimeSeriesStore
 from mkidplotter.gui.inputs import NoiseInput, BooleanListInput, FitInput, RangeInput
 from mkidplotter.gui.windows import SweepGUI, PulseGUI, FitGUI
 from mkidplotter.gui.parameters import (DirectoryParameter, FileParameter,
                                         TextEditParameter)
 from mkidplotter.gui.indicators import IntegerIndicator, FloatIndicator, BooleanIndicator, Indicator
 from mkidplotter.gui.widgets import (SweepPlotWidget, TransmissionPlotWidget, ScatterPlotWidget, HistogramPlotWidget,
-                                     NoisePlotWidget, PulsePlotWidget, TimePlotIndicator, FitPlotWidget,
-                                     ParametersWidget, TracePlotWidget)
+                                     NoisePlotWidget, PulsePlotWidget, TimePlotIndicator, MultiTimePlotIndicator,
+                                     FitPlotWidget, ParametersWidget, ParameterTrendWidget, TracePlotWidget,
+                                     SpectrogramPlotWidget, OverviewPlotWidget, HeatmapPlotWidget)
 from mkidplotter.gui.procedures import (SweepGUIProcedure1, SweepGUIProcedure2,
                                         SweepBaseProcedure, MKIDProcedure, FitProcedure)
 from mkidplotter.icons.manage_icons import get_image_icon
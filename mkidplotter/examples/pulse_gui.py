@@ -6,9 +6,9 @@ from mkidplotter import (PulseGUI, PulsePlotWidget, NoisePlotWidget, HistogramPl
 
 
 def pulse_window():
-    x_list = (('t', 't'), ('frequency', 'frequency'), ('hist x',),
+    x_list = (('t', 't'), ('frequency', 'frequency'), ('peaks 1',),
               ('t', 't'), ('frequency', 'frequency'), ('peaks 1',))
-    y_list = (('phase 1', 'amplitude 1'), ("phase PSD1", "amplitude PSD1"), ('hist y',),
+    y_list = (('phase 1', 'amplitude 1'), ("phase PSD1", "amplitude PSD1"), (None,),
               ('phase 2', 'amplitude 2'), ("phase PSD2", "amplitude PSD2"), ('peaks 2',))
     x_label = ("time [µs]", "frequency [Hz]", "amplitudes", "time [µs]", "frequency [Hz]", "Channel 1 Amplitudes")
     y_label = ("signal [V]", "PSD [V² / Hz]", "probability density", "signal [V]", "PSD [V² / Hz]",
@@ -22,7 +22,7 @@ class Pulse(MKIDProcedure):
     laser = VectorParameter("Laser", default=[0, 0, 0, 0, 0], length=5, ui_class=ui)
 
     DATA_COLUMNS = ['t', 'phase 1', 'amplitude 1', 'phase 2', 'amplitude 2', 'frequency', 'phase PSD1',
-                    'amplitude PSD1', 'phase PSD2', 'amplitude PSD2', 'hist x', 'hist y', 'peaks 1', 'peaks 2']
+                    'amplitude PSD1', 'phase PSD2', 'amplitude PSD2', 'peaks 1', 'peaks 2']
     wait_time = 0.1
 
     def startup(self):
@@ -44,14 +44,11 @@ class Pulse(MKIDProcedure):
             pulse2_a[i, :] = np.random.random_sample(self.n_trace) + 10
             peaks1.append(np.random.randn())
             peaks2.append(np.random.randn())
-            counts, bins = np.histogram(peaks1, bins='auto', density=True)
             data = {"t": np.arange(self.n_trace),
                     "phase 1": pulse1_p[i, :],
                     "amplitude 1": pulse1_a[i, :],
                     "phase 2": pulse2_p[i, :],
-                    "amplitude 2": pulse2_a[i, :],
-                    "hist x": bins,
-                    "hist y": counts}
+                    "amplitude 2": pulse2_a[i, :]}
             self.emit("results", data, clear=True)  # clear last pulse from gui file
             self.emit("results", {"peaks 1": peaks1[-1], "peaks 2": peaks2[-1]})  # don't need to clear these
             self.emit('progress', i / self.n_pulses * 100)
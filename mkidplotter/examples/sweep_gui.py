@@ -1,19 +1,21 @@
+import os
 import sys
+import tempfile
 from pymeasure.display.Qt import QtGui
 from mkidplotter.examples.sweep_procedure import Sweep
 from mkidplotter import (SweepGUI, SweepGUIProcedure2, SweepPlotWidget, NoisePlotWidget, TimePlotIndicator,
-                         get_image_icon)
+                         TimeSeries, TimeSeriesStore, get_image_icon)
 
 
 import numpy as np
 from datetime import datetime
-from collections import deque
 from threading import Thread, Event
 
 from mkidplotter.examples import pulse_gui
 
-time_stamps = deque(maxlen=int(24 * 60))
-temperatures = deque(maxlen=int(24 * 60))
+temperatures = TimeSeries()
+# readings are also saved so that the indicator starts with the last day of data
+temperature_store = TimeSeriesStore(os.path.join(tempfile.gettempdir(), "mkidplotter_example"))
 
 
 class Updater(Thread):
@@ -31,8 +33,9 @@ class Updater(Thread):
 
     @staticmethod
     def update():
-        time_stamps.append(datetime.now().timestamp())
-        temperatures.append(np.random.rand())
+        timestamp, temperature = datetime.now().timestamp(), np.random.rand()
+        temperature_store.append(timestamp, temperature)
+        temperatures.append(timestamp, temperature)
 
 
 def open_pulse_gui(self, experiment):
@@ -63,8 +66,8 @@ def sweep_window():
     legend_list = (('sweep', 'bias point'), ('Amplitude Noise', 'Phase Noise'),
                    ('sweep', 'bias point'), ('Amplitude Noise', 'Phase Noise'))
     widgets_list = (SweepPlotWidget, NoisePlotWidget, SweepPlotWidget, NoisePlotWidget)
+    indicators = TimePlotIndicator(temperatures, title='Device Temperature [mK]', store=temperature_store)
     Updater()
-    indicators = TimePlotIndicator(time_stamps, temperatures, title='Device Temperature [mK]')
     names_list = ('Channel 1: Sweep', 'Channel 1: Noise',
                   'Channel 2: Sweep', 'Channel 2: Noise')
 
@@ -1,18 +1,587 @@
+import os
+import contextlib
+import collections
 import logging
+import threading
 import numpy as np
 import pyqtgraph as pg
+from concurrent.futures import ThreadPoolExecutor
+from pyqtgraph.graphicsItems.GradientEditorItem import Gradients
 
+from pymeasure.experiment import Procedure
+from pymeasure.display.Qt import QtCore, QtGui
 from pymeasure.display.curves import ResultsCurve
 
+from mkidplotter.gui.results import RingColumn
+from mkidplotter.gui.spatial import SpatialIndex
+from mkidplotter.gui.decimation import LevelOfDetail
+from mkidplotter.gui.statistics import StreamingHistogram, StreamingHistogram2D, RunningBounds
+
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                               thread_name_prefix="curves")  # prepares the curve data
+
+
+def bin_edges(centers):
+    """
+    Returns the len(centers) + 1 bin edges for a stepMode="center" curve. The
+    edges are half way between the centers in log space if the positive centers
+    are more evenly spaced in log space than in linear space (e.g. log-spaced
+    PSDs) and in linear space otherwise. Bins at or below zero before them (e.g.
+    a DC bin) are linear, and the edges of centers that are all non-negative
+    don't go below zero, so the DC bin of a spectrum starts at zero.
+    """
+    centers = np.asarray(centers, dtype=float)
+    positive = centers > 0
+    first = int(np.argmax(positive)) if positive.any() else len(centers)
+    use_log = False
+    if len(centers) - first > 2 and positive[first:].all():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spacing, log_spacing = np.diff(centers[first:]), np.diff(np.log(centers[first:]))
+            use_log = (np.ptp(log_spacing) / np.abs(np.mean(log_spacing))
+                       < np.ptp(spacing) / np.abs(np.mean(spacing)))
+    edges = np.empty(len(centers) + 1)
+    start = first if use_log else 0
+    u = np.log(centers[start:]) if use_log else centers
+    edges[start + 1:-1] = (u[:-1] + u[1:]) / 2
+    edges[start] = u[0] - (u[1] - u[0]) / 2
+    edges[-1] = u[-1] + (u[-1] - u[-2]) / 2
+    if use_log:
+        edges[start:] = np.exp(edges[start:])
+        if start:
+            edges[1:start] = (centers[:start - 1] + centers[1:start]) / 2
+            edges[0] = 2 * centers[0] - edges[1]
+    if not (centers < 0).any():
+        edges = np.maximum(edges, 0)
+    return edges
+
+
+def column_version(results, key, reset=False):
+    """Returns the version of a results column or None if it isn't tracked."""
+    try:
+        return results.version(key, reset=reset)
+    except AttributeError:  # pymeasure Results
+        return None
+
+
+def column_data(results, key):
+    """
+    Returns a results column as an array that is shared with the other curves
+    plotting it or as it is stored if the results don't cache their columns.
+    """
+    try:
+        return results.column(key)
+    except AttributeError:  # pymeasure Results
+        return results.data[key]
+
+
+def column_window(results, key):
+    """
+    Returns the column like column_data() but copies the columns that drop
+    their oldest values (ring columns). Those arrays are views of a buffer that
+    is overwritten once enough values are appended, so anything built from them
+    (e.g. the level of detail or the drawn data) has to keep its own copy.
+    """
+    data = column_data(results, key)
+    if isinstance(getattr(results, "data", {}).get(key), RingColumn):
+        data = np.array(data)
+    return data
+
+
+def data_bounds(x, y, ax, frac=1.0, orthoRange=None):
+    """Returns the range of the finite x (ax=0) or y (ax=1) data like GraphicsItem.dataBounds()."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    data, other = (x[finite], y[finite]) if ax == 0 else (y[finite], x[finite])
+    if orthoRange is not None:
+        data = data[(other >= orthoRange[0]) & (other <= orthoRange[1])]
+    if not len(data):
+        return [None, None]
+    if frac >= 1.0:
+        return [data.min(), data.max()]
+    return list(np.percentile(data, [50 * (1 - frac), 50 * (1 + frac)]))
+
+
+class PointCloudItem(pg.GraphicsObject):
+    """
+    Draws a large number of same sized points by rasterizing them with numpy at
+    the resolution of the screen instead of painting a symbol at every point.
+    Each pixel gets the color that drawing the overlapping points on top of
+    each other would have given it, so dense regions show up darker when the
+    color is transparent.
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.x, self.y = np.empty(0), np.empty(0)
+        self.rect = QtCore.QRectF()
+        self.color = pg.mkColor('k')
+        self.size = 5
+        self.symbol = 'o'
+        self._image = None
+        self._image_key = None
+
+    def setData(self, x, y, color=None, size=5, symbol='o'):
+        self.prepareGeometryChange()
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        self.x, self.y = x[finite], y[finite]
+        if len(self.x):
+            self.rect = QtCore.QRectF(self.x.min(), self.y.min(), np.ptp(self.x), np.ptp(self.y))
+        else:
+            self.rect = QtCore.QRectF()
+        self.color = pg.mkColor(color if color is not None else 'k')
+        self.size, self.symbol = size, symbol
+        self._image_key = None
+        self.informViewBoundsChanged()
+        self.update()
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        return data_bounds(self.x, self.y, ax, frac=frac, orthoRange=orthoRange)
+
+    def pixelPadding(self):
+        return self.size / 2
+
+    def boundingRect(self):
+        if not len(self.x):
+            return QtCore.QRectF()
+        # pad by the point size since it is in pixels
+        width, height = self.pixelWidth() * self.size, self.pixelHeight() * self.size
+        return self.rect.adjusted(-width, -height, width, height)
+
+    def viewTransformChanged(self):
+        self.prepareGeometryChange()
+        super().viewTransformChanged()
+
+    def paint(self, p, *args):
+        transform, viewport = p.transform(), p.viewport()
+        key = (transform.m11(), transform.m12(), transform.m21(), transform.m22(), transform.dx(),
+               transform.dy(), viewport.x(), viewport.y(), viewport.width(), viewport.height())
+        if key != self._image_key:  # only rasterize again if the view or the data changed
+            self._image = self.rasterize(transform, viewport)
+            self._image_key = key
+        p.resetTransform()
+        p.drawImage(viewport.topLeft(), self._image)
+
+    def rasterize(self, transform, viewport):
+        """Returns a QImage of the points in the viewport of the painter."""
+        width, height = viewport.width(), viewport.height()
+        radius = max(int(self.size // 2), 0)
+        # count the points in each pixel of the viewport padded by the point radius
+        column = transform.m11() * self.x + transform.m21() * self.y + transform.dx() - viewport.x() + radius
+        row = transform.m12() * self.x + transform.m22() * self.y + transform.dy() - viewport.y() + radius
+        padded_width, padded_height = width + 2 * radius, height + 2 * radius
+        inside = (column >= 0) & (column < padded_width) & (row >= 0) & (row < padded_height)
+        index = row[inside].astype(int) * padded_width + column[inside].astype(int)
+        counts = np.bincount(index, minlength=padded_width * padded_height).reshape(padded_height, padded_width)
+        # spread the counts over the shape of the symbol
+        overlap = np.zeros((height, width))
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                if self.symbol == 'o' and dx**2 + dy**2 > radius**2:
+                    continue
+                overlap += counts[radius + dy:radius + dy + height, radius + dx:radius + dx + width]
+        alpha = 1 - (1 - self.color.alphaF())**overlap
+        argb = (np.round(alpha * 255).astype(np.uint32) << 24) | np.uint32(self.color.rgb() & 0xFFFFFF)
+        image = QtGui.QImage(argb.tobytes(), width, height, 4 * width, QtGui.QImage.Format_ARGB32)
+        return image.copy()  # own the memory since the bytes object is temporary
+
+
+class BatchedCurveItem(pg.GraphicsObject):
+    """
+    Draws the lines of many curves as one item. The lines of all of the curves
+    with the same pen are concatenated into one path, so a repaint costs one
+    drawPath() call per pen instead of one paint call per curve. Adding or
+    removing a curve only rebuilds the paths of its pen. Since the lines only
+    change when a curve is added, removed or restyled, the rendered item is
+    cached by Qt and redrawing the live curves on top of it costs a blit.
+    """
+    PATH_SIZE = 10000  # number of points per path
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.setCacheMode(self.DeviceCoordinateCache)
+        self.segments = {}  # curve -> (data key, x, y, pen key, (x min, y min, x max, y max))
+        self._pens = {}  # pen key -> QPen
+        self._paths = {}  # pen key -> list of QPainterPaths or None if they need to be rebuilt
+        self._rect = QtCore.QRectF()
+
+    def set_segment(self, item, x, y, pen):
+        """Sets the line drawn for item."""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        data_key = (x.__array_interface__['data'][0], y.__array_interface__['data'][0], len(x), len(y))
+        pen = pg.mkPen(pen)
+        pen_key = (pen.color().rgba(), pen.widthF(), int(pen.style()), pen.isCosmetic())
+        old = self.segments.get(item)
+        if old is not None and old[0] == data_key and old[3] == pen_key:
+            return
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y = x[finite], y[finite]
+        rect = (x.min(), y.min(), x.max(), y.max()) if len(x) else None
+        if old is not None:
+            self._paths[old[3]] = None
+        self.segments[item] = (data_key, x, y, pen_key, rect)
+        self._pens[pen_key], self._paths[pen_key] = pen, None
+        self._changed()
+
+    def remove(self, item):
+        """Stops drawing the line of item."""
+        old = self.segments.pop(item, None)
+        if old is not None:
+            self._paths[old[3]] = None
+            self._changed()
+
+    def _changed(self):
+        self.prepareGeometryChange()
+        bounds = np.array([segment[4] for segment in self.segments.values() if segment[4] is not None])
+        if len(bounds):
+            x_min, y_min = bounds[:, :2].min(axis=0)
+            x_max, y_max = bounds[:, 2:].max(axis=0)
+            self._rect = QtCore.QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
+        else:
+            self._rect = QtCore.QRectF()
+        self.informViewBoundsChanged()
+        self.update()
+
+    def boundingRect(self):
+        if not self.segments:
+            return QtCore.QRectF()
+        # pad by the widest pen since it is in pixels
+        width = max(pen.widthF() for pen in self._pens.values()) + 1
+        width, height = self.pixelWidth() * width, self.pixelHeight() * width
+        return self._rect.adjusted(-width, -height, width, height)
+
+    def viewTransformChanged(self):
+        self.prepareGeometryChange()
+        super().viewTransformChanged()
+
+    def paint(self, p, *args):
+        for pen_key, paths in list(self._paths.items()):
+            if paths is None:
+                segments = [segment[1:3] for segment in self.segments.values() if segment[3] == pen_key]
+                if not segments:
+                    del self._paths[pen_key], self._pens[pen_key]
+                    continue
+                self._paths[pen_key] = self._build_paths(segments)
+        p.setRenderHint(p.Antialiasing, pg.getConfigOption('antialias'))
+        for pen_key, paths in self._paths.items():
+            p.setPen(self._pens[pen_key])
+            for path in paths:
+                p.drawPath(path)
+
+    def _build_paths(self, segments):
+        # Qt strokes wide pens much slower on very long paths, so group the
+        # lines into paths of about PATH_SIZE points
+        paths, group, size = [], [], 0
+        for index, (x, y) in enumerate(segments):
+            group.append((x, y))
+            size += len(x)
+            if size >= self.PATH_SIZE or index == len(segments) - 1:
+                x, y = np.concatenate([g[0] for g in group]), np.concatenate([g[1] for g in group])
+                connect = np.ones(len(x), dtype=np.int32)  # don't connect the end of a line to the next
+                connect[np.cumsum([len(g[0]) for g in group]) - 1] = 0
+                paths.append(pg.arrayToQPath(x, y, connect=connect))
+                group, size = [], 0
+        return paths
+
+
+class WaterfallItem(pg.GraphicsObject):
+    """
+    Image of the newest spectra with one row per spectrum. The spectra are
+    averaged into bins that are evenly spaced in log10(x) (or x if log is False)
+    and kept in a ring buffer of rows. The image is an 8 bit indexed QImage
+    whose pixels are written in place, so adding a spectrum only colors its
+    row instead of converting the whole array again. The rows are drawn from
+    the oldest (bottom) to the newest (top) with two drawImage() calls. Unless
+    fixed levels are given, the color levels only grow when a spectrum falls
+    outside of them, which is the only time that every row is colored again.
+    """
+    ROWS = 1000  # number of spectra shown
+    BINS = 512  # number of x bins
+    MARGIN = 0.1  # fraction of the level range that is added whenever the levels grow
+
+    def __init__(self, rows=None, bins=None, levels=None, log=True):
+        super().__init__()
+        self.rows = self.ROWS if rows is None else rows
+        self.bins = self.BINS if bins is None else bins
+        self.log = log
+        self.fixed_levels = levels is not None
+        self.levels = levels
+        self.edges = None  # bin edges in the plot coordinates (log10(x) if log is True)
+        self.count = 0  # number of spectra added so far
+        self._lock = threading.Lock()
+        self._data = np.full((self.rows, self.bins), np.nan, dtype=np.float32)
+        self._image = QtGui.QImage(self.bins, self.rows, QtGui.QImage.Format_Indexed8)
+        ticks = Gradients['viridis']['ticks']
+        colors = pg.ColorMap([tick[0] for tick in ticks], [tick[1] for tick in ticks]).getLookupTable(nPts=255)
+        self._image.setColorTable([QtGui.qRgba(0, 0, 0, 0)] + [QtGui.qRgb(*color[:3]) for color in colors])
+        pointer = self._image.bits()
+        pointer.setsize(self._image.sizeInBytes())
+        self._pixels = np.frombuffer(pointer, dtype=np.uint8).reshape(self.rows, -1)[:, :self.bins]
+        self._pixels[:] = 0  # transparent until a spectrum is added
+
+    def resample(self, x, y):
+        """
+        Returns the spectrum averaged into the bins of the image. Bins between
+        the samples are interpolated and bins outside of them are NaN. The bins
+        span the first spectrum that is resampled. This method can be called
+        from a worker thread.
+        """
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        keep = np.isfinite(x) & np.isfinite(y)
+        if self.log:
+            keep &= x > 0
+        x, y = x[keep], y[keep]
+        order = np.argsort(x, kind="stable")
+        x, y = (np.log10(x[order]) if self.log else x[order]), y[order]
+        if len(x) < 2:
+            return None
+        with self._lock:
+            if self.edges is None:
+                self.edges = np.linspace(x[0], x[-1], self.bins + 1)
+        index = np.searchsorted(x, self.edges)
+        index[-1] = np.searchsorted(x, self.edges[-1], side="right")  # the last bin includes its upper edge
+        counts = np.diff(index)
+        sums = np.concatenate(([0], np.cumsum(y)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            row = (sums[index[1:]] - sums[index[:-1]]) / counts
+        empty = counts == 0
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        row[empty] = np.interp(centers[empty], x, y, left=np.nan, right=np.nan)
+        return row
+
+    def add_row(self, row):
+        """Adds a spectrum returned by resample() as the newest row."""
+        position = self.count % self.rows
+        self._data[position] = row
+        self.count += 1
+        finite = row[np.isfinite(row)]
+        if not self.fixed_levels and len(finite):
+            low, high = finite.min(), finite.max()
+            if self.levels is None or low < self.levels[0] or high > self.levels[1]:
+                if self.levels is not None:
+                    low, high = min(low, self.levels[0]), max(high, self.levels[1])
+                margin = self.MARGIN * (high - low) if high > low else 1
+                self.levels = (low - margin, high + margin)
+                position = slice(None)  # every row has to be colored with the new levels
+        self._color(position)
+        self.prepareGeometryChange()
+        self.informViewBoundsChanged()
+        self.update()
+
+    def set_levels(self, levels):
+        """Fixes the color levels or lets them follow the data again if levels is None."""
+        self.fixed_levels = levels is not None
+        self.levels = levels
+        if levels is None:
+            finite = self._data[np.isfinite(self._data)]
+            if len(finite):
+                margin = self.MARGIN * (finite.max() - finite.min()) or 1
+                self.levels = (finite.min() - margin, finite.max() + margin)
+        self._color(slice(None))
+        self.update()
+
+    def clear(self):
+        self.count = 0
+        self._data[:] = np.nan
+        self._pixels[:] = 0
+        if not self.fixed_levels:
+            self.levels = None
+        self.prepareGeometryChange()
+        self.informViewBoundsChanged()
+        self.update()
+
+    def _color(self, rows):
+        if self.levels is None:
+            return
+        low, high = self.levels
+        values = self._data[rows]
+        with np.errstate(invalid="ignore"):
+            index = np.clip((values - low) * (254 / max(high - low, 1e-12)), 0, 254) + 1
+        self._pixels[rows] = np.where(np.isfinite(values), index, 0)
+
+    def boundingRect(self):
+        if self.edges is None or not self.count:
+            return QtCore.QRectF()
+        size = min(self.count, self.rows)
+        return QtCore.QRectF(self.edges[0], self.count - size, self.edges[-1] - self.edges[0], size)
+
+    def paint(self, painter, *args):
+        if self.edges is None or not self.count:
+            return
+        size = min(self.count, self.rows)
+        start = self.count % self.rows if self.count > self.rows else 0  # row of the oldest spectrum
+        x0, width = self.edges[0], self.edges[-1] - self.edges[0]
+        y = self.count - size
+        for first, last in ((start, size), (0, start)):
+            if last > first:
+                painter.drawImage(QtCore.QRectF(x0, y, width, last - first), self._image,
+                                  QtCore.QRectF(0, first, self.bins, last - first))
+                y += last - first
+
+
+class OverviewItem(pg.GraphicsObject):
+    """
+    Grid of small panels that each show the line of one curve, e.g. the IQ
+    loop of every tone in a long frequency list. All of the panels are drawn by
+    this one item without axes. Each line is decimated to at most POINTS points,
+    scaled to fill its own cell and kept as a QPainterPath that is only rebuilt
+    when the line is set again, so a repaint is one drawPath() per panel. The
+    cells are unit squares laid out row by row from the top left in the order
+    that the panels were added, with as many columns as rows unless columns is
+    given. Dimmed panels are drawn in gray.
+    """
+    POINTS = 200  # maximum number of points drawn per panel
+    GAP = 0.1  # space between the cells as a fraction of their size
+    PADDING = 0.05  # space between a line and the edges of its cell as a fraction of the cell size
+
+    def __init__(self, columns=None, equal_aspect=False):
+        super().__init__()
+        self.setCacheMode(self.DeviceCoordinateCache)
+        self.setFlag(self.ItemUsesExtendedStyleOption)  # only paint the exposed panels
+        self.columns = columns
+        self.equal_aspect = equal_aspect  # scale x and y of a panel equally (e.g. for IQ loops)
+        self.panels = {}  # key -> [QPainterPath or None, QPen, dimmed]
+        self._order = []  # keys of the panels in the order of the cells
+        self.frame_pen = pg.mkPen(color=(200, 200, 200))
+        self.dim_pen = pg.mkPen(color=(190, 190, 190))
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, key):
+        return key in self.panels
+
+    def set_panel(self, key, x, y, pen):
+        """Sets the line drawn in the panel of key, which is added if it is new."""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y = x[finite], y[finite]
+        if len(x) > self.POINTS:
+            if LevelOfDetail.is_monotonic(x):  # keep the peaks of e.g. |S21| traces
+                x, y = LevelOfDetail(x, y).query(x[0], x[-1], self.POINTS // 2)
+            else:
+                step = int(np.ceil(len(x) / self.POINTS))
+                x, y = np.append(x[:-1:step], x[-1]), np.append(y[:-1:step], y[-1])
+        path = None
+        if len(x):
+            x_span, y_span = np.ptp(x) or 1, np.ptp(y) or 1
+            if self.equal_aspect:
+                x_span = y_span = max(x_span, y_span)
+            scale = 1 - 2 * self.PADDING
+            u = 0.5 + (x - (x.min() + x.max()) / 2) * (scale / x_span)
+            v = 0.5 + (y - (y.min() + y.max()) / 2) * (scale / y_span)
+            path = pg.arrayToQPath(u, v)
+        new = key not in self.panels
+        self.panels[key] = [path, pen, False if new else self.panels[key][2]]
+        if new:
+            self._order.append(key)
+            self._changed()
+        else:
+            self.update()
+
+    def set_pen(self, key, pen):
+        if key in self.panels:
+            self.panels[key][1] = pen
+            self.update()
+
+    def set_dimmed(self, key, dimmed):
+        if key in self.panels and self.panels[key][2] != dimmed:
+            self.panels[key][2] = dimmed
+            self.update()
+
+    def remove(self, key):
+        """Removes the panel of key. The panels after it move up one cell."""
+        if self.panels.pop(key, None) is not None:
+            self._order.remove(key)
+            self._changed()
+
+    def clear(self):
+        self.panels, self._order = {}, []
+        self._changed()
+
+    def panel_at(self, x, y):
+        """Returns the key of the panel at the item coordinates x and y or None."""
+        size = 1 + self.GAP
+        column, row = int(np.floor(x / size)), int(np.floor(-y / size))
+        columns = self._columns()
+        inside = x - column * size <= 1 and -y - row * size <= 1  # not in the gap
+        index = row * columns + column
+        if inside and 0 <= column < columns and 0 <= row and index < len(self._order):
+            return self._order[index]
+        return None
+
+    def _columns(self):
+        if self.columns is not None:
+            return self.columns
+        return max(int(np.ceil(np.sqrt(len(self._order)))), 1)
+
+    def _changed(self):
+        self.prepareGeometryChange()
+        self.informViewBoundsChanged()
+        self.update()
+
+    def boundingRect(self):
+        if not self._order:
+            return QtCore.QRectF()
+        columns = self._columns()
+        rows = int(np.ceil(len(self._order) / columns))
+        size = 1 + self.GAP
+        width, height = min(columns, len(self._order)) * size - self.GAP, rows * size - self.GAP
+        return QtCore.QRectF(0, -height, width, height)
+
+    def paint(self, painter, option, *args):
+        columns, size = self._columns(), 1 + self.GAP
+        exposed = option.exposedRect
+        painter.setRenderHint(painter.Antialiasing, pg.getConfigOption('antialias'))
+        for index, key in enumerate(self._order):
+            cell = QtCore.QRectF((index % columns) * size, -(index // columns) * size - 1, 1, 1)
+            if not exposed.intersects(cell):
+                continue
+            path, pen, dimmed = self.panels[key]
+            painter.setPen(self.frame_pen)
+            painter.drawRect(cell)
+            if path is not None:
+                painter.translate(cell.topLeft())
+                painter.setPen(self.dim_pen if dimmed else pen)
+                painter.drawPath(path)
+                painter.translate(-cell.topLeft())
+
 
 class MKIDResultsCurve(ResultsCurve):
-    """Extension of the pymeasure ResultsCurve class"""
+    """
+    Extension of the pymeasure ResultsCurve class. The data is prepared for
+    drawing in a worker thread so that large datasets don't block the GUI, and
+    only the final arrays are handed to pyqtgraph in the GUI thread.
+    """
+    LOD_THRESHOLD = 5000  # only decimate curves that have more points than this
+    prepared = QtCore.QSignal(object)
+    _lod = None
+    _lod_key = None
+    _lod_kwargs = {}
+    _bounds = None  # RunningBounds of the drawn x and y data
+    _index = None  # SpatialIndex of the drawn data
+    _running_key = None  # reset versions of the columns in the running bounds and index
+    _running_bounds = None
+    _running_index = None
+    _running_lod = None
+    _density = None  # ImageItem of a 2D histogram drawn behind the curve
 
-    def __init__(self, results, x, y, xerr=None, yerr=None, force_reload=False, **kwargs):
+    def __init__(self, results, x, y, xerr=None, yerr=None, force_reload=False, decimate=False,
+                 point_cloud_threshold=None, cache_finished=False, batch=None, **kwargs):
+        self.point_cloud_threshold = point_cloud_threshold
+        self._point_cloud = None
+        self.batch = batch  # BatchedCurveItem that draws the line once the experiment has finished
+        self._finished = False
+        self._batched = False  # the line is drawn by the batch instead of this curve
         super().__init__(results, x, y, xerr=xerr, yerr=yerr, force_reload=force_reload, **kwargs)
+        self.decimate = decimate
+        self.cache_finished = cache_finished
+        self._busy = False  # a preparation is running in the worker pool
+        self._queued = False  # the data changed while the preparation was running
+        self._released = False  # the curve was removed from the plot and its data dropped
+        self.prepared.connect(self._draw_prepared)
         self.symbolBrush = kwargs.get('symbolBrush', None)
         color = kwargs.get('color')
         if self.pen is not None and color is not None:
@@ -22,25 +591,442 @@ class MKIDResultsCurve(ResultsCurve):
 
     def update(self):
         """Updates the data by polling the results"""
+        # Only one preparation runs at a time per curve. Updates requested in the
+        # mean time are merged into a single one that starts when it finishes.
+        self._released = False
+        if self._busy:
+            self._queued = True
+            return
+        self._busy = True
+        _executor.submit(self._prepare)
+
+    def release(self):
+        """
+        Drops the drawn data and everything prepared for drawing it after the
+        curve is removed from the plot. The next update() prepares it again from
+        the results.
+        """
+        self._released = True
+        if not self._busy:  # otherwise it's done once the running preparation returns
+            self.reset()
+
+    def reset(self):
+        """Forgets the data prepared so far so that it's redone from the results."""
+        self.clear()
+        self._lod = self._bounds = self._index = None
+        if self.batch is not None:
+            self.batch.remove(self)
+            self._batched = False
+        self._running_key = self._running_bounds = self._running_index = self._running_lod = None
+        if self._point_cloud is not None:
+            self._point_cloud.setParentItem(None)
+            self._point_cloud = None
+        if self._density is not None:
+            self._density.setParentItem(None)
+            self._density = None
+
+    def finish(self):
+        """
+        Called once the experiment of the curve has finished and its data won't
+        change anymore. If cache_finished is True, the line and symbols are
+        rendered once into a pixmap that Qt reuses for every repaint of the plot
+        until the view or the style changes, so only the running curve is redrawn.
+        If the curve has a batch, its line is handed over to be drawn with the
+        lines of the other finished curves.
+        """
+        self._finished = True
+        if self.batch is not None and self.xData is not None:
+            self.updateItems()
+        if self.cache_finished:
+            for item in (self.curve, self.scatter):
+                item.setCacheMode(QtGui.QGraphicsItem.DeviceCoordinateCache)
+
+    def _prepare(self):
+        try:
+            prepared = self.prepare()
+        except Exception:
+            log.exception("Could not prepare the data for plotting")
+            prepared = None
+        try:
+            self.prepared.emit(prepared)
+        except RuntimeError:  # the curve was deleted
+            pass
+
+    def _draw_prepared(self, prepared):
+        self._busy = False
+        if self._released:
+            self._queued = False
+            self.reset()
+            return
+        self.draw(prepared)
+        if self._queued:
+            self._queued = False
+            self.update()
+
+    def prepare(self):
+        """
+        Returns the data to draw from the results or None if it hasn't changed.
+        This method runs in a worker thread and must not touch the plot.
+        """
         if self.force_reload:
             self.results.reload()
-        data = self.results.data  # get the current snapshot
+        # read the columns together so that columns that drop values (e.g. ring columns) match their versions
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            key = (column_version(self.results, self.x, reset=True),
+                   column_version(self.results, self.y, reset=True))
+            x_data, y_data = column_window(self.results, self.x), column_window(self.results, self.y)
+        if len(x_data) != len(y_data):
+            return None
+        if None in key:
+            prepared = self.prepare_data(x_data, y_data)
+        else:
+            # start the running bounds, index and level of detail over if a column was replaced
+            if key != self._running_key or len(x_data) < self._running_bounds[0].size:
+                self._running_key = key
+                self._running_bounds = (RunningBounds(), RunningBounds())
+                self._running_index = SpatialIndex()
+                self._running_lod = LevelOfDetail()
+            prepared = self.prepare_data(x_data, y_data, lod=self._running_lod)
+            prepared['bounds'] = self.prepare_bounds(x_data, y_data)
+            prepared['index'] = self.prepare_index(x_data, y_data)
+        # Set error bars if enabled at construction
+        if hasattr(self, '_errorBars'):
+            data = self.results.data
+            prepared['error_bars'] = dict(
+                x=x_data,
+                y=y_data,
+                top=data[self.yerr],
+                bottom=data[self.yerr],
+                left=data[self.xerr],
+                right=data[self.yerr],
+                beam=max(data[self.xerr], data[self.yerr])
+            )
+        return prepared
 
-        # Set x-y data
-        if len(data[self.x]) == len(data[self.y]):
-            self.setData(data[self.x], data[self.y])
-
-            # Set error bars if enabled at construction
-            if hasattr(self, '_errorBars'):
-                self._errorBars.setOpts(
-                    x=data[self.x],
-                    y=data[self.y],
-                    top=data[self.yerr],
-                    bottom=data[self.yerr],
-                    left=data[self.xerr],
-                    right=data[self.yerr],
-                    beam=max(data[self.xerr], data[self.yerr])
-                )
+    def prepare_bounds(self, x, y):
+        """
+        Returns copies of the RunningBounds of the x and y columns after adding
+        the values appended since the last call.
+        """
+        for bounds, data in zip(self._running_bounds, (x, y)):
+            bounds.add(data[bounds.size:])
+        return tuple(bounds.copy() for bounds in self._running_bounds)
+
+    def prepare_index(self, x, y):
+        """
+        Returns a copy of the SpatialIndex of the data after adding the points
+        appended since the last call.
+        """
+        self._running_index.add(x, y)
+        return self._running_index.copy()
+
+    def prepare_data(self, x, y, lod=None, **kwargs):
+        """
+        Returns the x and y data with their setData() keyword arguments. If
+        decimation is enabled, a LevelOfDetail is built for long traces with
+        increasing x values so that they can be drawn at the resolution of the
+        plot. An existing LevelOfDetail of the start of the trace can be given
+        as lod to only add the samples appended to it.
+        """
+        step = kwargs.get("stepMode") == "center"
+        if self.decimate and len(y) > self.LOD_THRESHOLD and len(x) == len(y) + step:
+            lod = LevelOfDetail(step=step) if lod is None else lod
+            lod = lod.copy() if lod.extend(x, y) else None
+        else:
+            lod = None
+        prepared = {'x': x, 'y': y, 'kwargs': kwargs, 'lod': lod}
+        if step and len(x) == len(y) + 1:
+            # the steps are found by their centers since x holds their edges
+            prepared['index'] = SpatialIndex()
+            prepared['index'].add(0.5 * (x[:-1] + x[1:]), y)
+        return prepared
+
+    def draw(self, prepared):
+        """Draws the data returned by prepare() in the GUI thread."""
+        if prepared is None:
+            if self.xData is not None:
+                self.updateItems()  # the data hasn't changed so only the style needs updating
+            return
+        self._bounds = prepared.get('bounds')
+        self._index = prepared.get('index')
+        self._lod = prepared['lod']
+        if self._lod is not None:
+            self._lod_key = None
+            self._lod_kwargs = prepared['kwargs']
+            self.update_level_of_detail()
+        else:
+            self.setData(prepared['x'], prepared['y'], **prepared['kwargs'])
+        if 'error_bars' in prepared:
+            self._errorBars.setOpts(**prepared['error_bars'])
+
+    def ensemble_data(self):
+        """Returns the x and y data that the curve draws for computing ensemble statistics."""
+        return column_data(self.results, self.x), column_data(self.results, self.y)
+
+    def draw_density(self, density):
+        """
+        Draws the image returned by StreamingHistogram2D.image() behind the
+        curve or hides it if density is None. The bins are colored with the
+        symbol color and an opacity that grows with log(counts).
+        """
+        if density is None:
+            if self._density is not None:
+                self._density.hide()
+            return
+        if self._density is None:
+            self._density = pg.ImageItem()
+            self._density.setParentItem(self)
+            self._density.setZValue(-1)
+        counts, rect = density
+        brush = self.opts['symbolBrush']
+        color = pg.mkBrush(brush).color() if brush is not None else pg.mkColor(self.opts['color'])
+        lut = np.zeros((256, 4), dtype=np.ubyte)
+        lut[:, :3] = color.red(), color.green(), color.blue()
+        lut[1:, 3] = np.linspace(64, 255, 255)
+        image = np.log1p(counts)
+        self._density.setImage(image, lut=lut, levels=(0, max(image.max(), 1e-9)), autoLevels=False)
+        self._density.setRect(QtCore.QRectF(*rect))
+        self._density.show()
+        self.informViewBoundsChanged()
+
+    def update_level_of_detail(self):
+        """Redraws the decimated data for the current view range and plot width."""
+        view_box = self.getViewBox()
+        x_range, n_columns, log = self._lod.x_range, 1000, self.opts['logMode'][0]
+        if view_box is not None:
+            if view_box.width() > 0:
+                n_columns = int(view_box.width())
+            # don't clip the data while auto ranging or the range will never grow
+            if not view_box.autoRangeEnabled()[0]:
+                x_range = view_box.viewRange()[0]
+                if log:
+                    x_range = [10**value for value in x_range]
+        key = (tuple(x_range), n_columns, log)
+        if key != self._lod_key:
+            self._lod_key = key
+            x, y = self._lod.query(x_range[0], x_range[1], n_columns, log=log)
+            self.setData(x, y, **self._lod_kwargs)
+
+    def viewRangeChanged(self):
+        super().viewRangeChanged()
+        if self._lod is not None:
+            self.update_level_of_detail()
+
+    def nearest(self, x, y, x_scale, y_scale, radius):
+        """
+        Returns the data point closest to (x, y) within radius or None. The
+        distances are measured after dividing by the scales (e.g. in pixels).
+        The coordinates are those of the view, so they are in log10 space for
+        the axes that are in log mode.
+        """
+        if self._index is None:
+            return None
+        log_x, log_y = self.opts['logMode']
+        index = self._index.nearest(x, y, x_scale, y_scale, radius, log_x=log_x, log_y=log_y)
+        if index is None:
+            return None
+        x, y = self._index.x[index], self._index.y[index]
+        return np.log10(x) if log_x else x, np.log10(y) if log_y else y
+
+    def updateItems(self, *args, **kwargs):
+        x, y = self.getData()
+        symbol, pen = self.opts['symbol'], self.opts['pen']
+        self.update_batch(x, y)
+        hide_pen = self._batched
+        # draw the symbols as a point cloud if there are too many of them
+        if (symbol is None or x is None or not self.opts['pxMode'] or self.point_cloud_threshold is None
+                or len(y) <= self.point_cloud_threshold):
+            if self._point_cloud is not None:
+                self._point_cloud.hide()
+        else:
+            if self._point_cloud is None:
+                self._point_cloud = PointCloudItem()
+                self._point_cloud.setParentItem(self)
+            if self.opts.get('stepMode', False) in ("center", True):
+                x = 0.5 * (x[:-1] + x[1:])
+            brush = self.opts['symbolBrush']
+            self._point_cloud.setData(x, y, color=brush.color() if brush is not None else None,
+                                      size=self.opts['symbolSize'], symbol=symbol)
+            self._point_cloud.show()
+            self.opts['symbol'] = None
+            if pen is not None and pg.mkPen(pen).style() == QtCore.Qt.NoPen and self.opts['fillLevel'] is None:
+                hide_pen = True  # skip building the path of an invisible line
+        if hide_pen:
+            self.opts['pen'] = None
+        try:
+            super().updateItems(*args, **kwargs)
+        finally:
+            self.opts['symbol'], self.opts['pen'] = symbol, pen
+        if self._batched:
+            self.curve.clear()  # the batch has the only copy of the path
+
+    def update_batch(self, x, y):
+        """Hands the line of a finished curve to its batch or takes it back."""
+        if self.batch is None:
+            return
+        pen = self.opts['pen']
+        finished = self._finished and getattr(self.results.procedure, "status", None) not in (Procedure.QUEUED,
+                                                                                            Procedure.RUNNING)
+        self._batched = (finished and self._lod is None and x is not None
+                         and self.scene() is not None and pen is not None and pg.mkPen(pen).style() != QtCore.Qt.NoPen
+                         and self.opts['fillLevel'] is None and self.opts['connect'] == 'all'
+                         and self.opts.get('stepMode', False) in (None, False))
+        if self._batched:
+            self.batch.set_segment(self, x, y, pen)
+        else:
+            self.batch.remove(self)
+
+    def itemChange(self, change, value):
+        # the batch draws the line of the curve so it has to follow it in and out of the plot
+        if self.batch is not None and change == self.ItemSceneHasChanged:
+            if value is None:
+                self.batch.remove(self)
+                self._batched = False
+            elif self._finished and self.xData is not None:
+                self.updateItems()
+        return super().itemChange(change, value)
+
+    def pixelPadding(self):
+        padding = super().pixelPadding()
+        if self._point_cloud is not None and self._point_cloud.isVisible():
+            padding = max(padding, self._point_cloud.pixelPadding())
+        return padding
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        point_cloud = self._point_cloud is not None and self._point_cloud.isVisible()
+        # use the running bounds instead of rescanning all of the data when autoranging
+        if self._bounds is not None and orthoRange is None and self.opts['fillLevel'] is None:
+            if not (point_cloud or self._batched or self.curve.isVisible() or self.scatter.isVisible()):
+                return [None, None]
+            bounds = self._bounds[ax].bounds(frac)
+            if bounds is None:
+                return [None, None]
+            if not self.opts['logMode'][ax]:
+                return list(bounds)
+            if bounds[0] > 0:
+                return [np.log10(bounds[0]), np.log10(bounds[1])]
+        if point_cloud and not self.curve.isVisible():
+            return self._point_cloud.dataBounds(ax, frac=frac, orthoRange=orthoRange)
+        if self._batched and not self.scatter.isVisible():
+            x, y = self.getData()
+            return data_bounds(x, y, ax, frac=frac, orthoRange=orthoRange)
+        return super().dataBounds(ax, frac=frac, orthoRange=orthoRange)
+
+
+class DensityResultsCurve(MKIDResultsCurve):
+    """
+    Plots the points as symbols until there are more than DENSITY_THRESHOLD of
+    them and as an image of their 2D histogram on a log color scale after that.
+    The histogram is updated with the newly appended points only.
+    """
+    DENSITY_THRESHOLD = 100000
+    _histogram = None
+    _histogram_key = None  # running key of the columns in the histogram
+
+    def prepare(self):
+        prepared = super().prepare()
+        if prepared is None or self._running_key is None:
+            return prepared
+        x, y = prepared['x'], prepared['y']
+        if (self._histogram is None or self._histogram_key != self._running_key
+                or len(x) < self._histogram.n_samples):
+            self._histogram = StreamingHistogram2D()
+            self._histogram_key = self._running_key
+        start = self._histogram.n_samples
+        self._histogram.add(x[start:], y[start:])
+        if len(x) > self.DENSITY_THRESHOLD and not any(self.opts['logMode']):
+            prepared['density'] = self._histogram.image()
+        return prepared
+
+    def draw(self, prepared):
+        density = prepared.get('density') if prepared is not None else None
+        if density is None:
+            self.draw_density(None)
+            super().draw(prepared)
+            return
+        self._bounds = prepared.get('bounds')
+        self._index = prepared.get('index')
+        self.clear()  # the points are only drawn through the histogram
+        if self._point_cloud is not None:
+            self._point_cloud.hide()
+        self.draw_density(density)
+
+    def reset(self):
+        super().reset()
+        self._histogram = None
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if self._density is not None and self._density.isVisible() and self._bounds is not None:
+            bounds = self._bounds[ax].bounds(frac)
+            return [None, None] if bounds is None else list(bounds)
+        return super().dataBounds(ax, frac=frac, orthoRange=orthoRange)
+
+
+class PersistenceResultsCurve(MKIDResultsCurve):
+    """
+    Draws the latest trace on top of an image of all of the traces so far.
+    Every record appended to the results is queued by the thread that appends
+    it and binned into the image by the next preparation, so traces that are
+    replaced before the plot is refreshed (or while it is hidden) are still
+    counted without slowing down the procedure. A record that replaces the
+    columns starts a new trace, at which point the counts of the old ones are
+    multiplied by DECAY. The image is kept when the curve is released. Results
+    that aren't appended to (e.g. loaded from a file) only show the trace that
+    they hold.
+    """
+    DECAY = 1.  # 1 keeps all of the traces and smaller values fade out the old ones
+    PENDING = 2**20  # bin the queued traces when they are appended if they have more samples than this
+
+    def __init__(self, *args, **kwargs):
+        self._histogram = StreamingHistogram2D()
+        self._histogram_lock = threading.Lock()
+        self._records = collections.deque()  # traces appended since the last preparation
+        self._pending = 0  # number of samples in the queued traces
+        super().__init__(*args, **kwargs)
+        if hasattr(self.results, "listen"):
+            self.results.listen(self.add_record)
+
+    def add_record(self, record, clear=False):
+        """Queues the trace in a record of the results to be binned by the next preparation."""
+        if self.x not in record or self.y not in record:
+            return
+        # copy the trace in case the procedure reuses its arrays
+        x, y = np.array(record[self.x], dtype=float), np.array(record[self.y], dtype=float)
+        self._records.append((x, y, clear))
+        self._pending += y.size
+        if self._pending > self.PENDING:  # e.g. the curve is hidden, so don't keep every trace
+            with self._histogram_lock:
+                self._bin_records()
+
+    def _bin_records(self):
+        """Bins the queued traces. The histogram lock must be held."""
+        self._pending = 0
+        while self._records:
+            x, y, clear = self._records.popleft()
+            if clear:
+                self._histogram.counts *= self.DECAY
+            self._histogram.add(x, y)
+
+    def prepare(self):
+        prepared = super().prepare()
+        if prepared is None:
+            return prepared
+        with self._histogram_lock:
+            self._bin_records()
+            if not self._histogram.n_samples:  # no records were appended
+                with getattr(self.results, "lock", contextlib.nullcontext()):
+                    x_data, y_data = column_data(self.results, self.x), column_data(self.results, self.y)
+                if len(x_data) == len(y_data):
+                    self._histogram.add(x_data, y_data)
+            image = self._histogram.image()
+        if not any(self.opts['logMode']):
+            prepared['persistence'] = image
+        return prepared
+
+    def draw(self, prepared):
+        super().draw(prepared)
+        if prepared is not None:
+            self.draw_density(prepared.get('persistence'))
 
 
 class ParameterResultsCurve(MKIDResultsCurve):
@@ -51,35 +1037,250 @@ class ParameterResultsCurve(MKIDResultsCurve):
 
 
 class NoiseResultsCurve(MKIDResultsCurve):
-    """Extension of the pymeasure ResultsCurve class"""
+    """Plots a power spectral density in dB as steps centered on its frequencies"""
+    _version = None
 
-    def update(self):
-        """Updates the data by polling the results"""
+    def prepare(self):
         if self.force_reload:
             self.results.reload()
-        data = self.results.data  # get the current snapshot        
+        # only redo the transforms if the PSD has changed since the last update
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            version = (column_version(self.results, self.x), column_version(self.results, self.y))
+            if version == self._version and None not in version:
+                return None
+            self._version = version
+            x_data, y_data = column_data(self.results, self.x), column_data(self.results, self.y)
+        if len(x_data) <= 1 or len(x_data) != len(y_data):
+            return None
+        with np.errstate(divide="ignore"):
+            y_data = 10 * np.log10(np.asarray(y_data, dtype=float))
+        return self.prepare_data(bin_edges(x_data), y_data, stepMode="center")
 
-        # Set x-y data
-        x_data = data[self.x].copy()
-        y_data = data[self.y]
-        if len(x_data) > 1 and len(x_data) == len(y_data):
-            dx = x_data[1] - x_data[0]
-            x_data.append(x_data[-1] + dx)
-            x_data = [x - dx / 2 for x in x_data]
-            self.setData(x_data, 10 * np.log10(y_data), stepMode="center")
+    def ensemble_data(self):
+        x_data, y_data = super().ensemble_data()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return x_data, 10 * np.log10(np.asarray(y_data, dtype=float))
+
+    def reset(self):
+        super().reset()
+        self._version = None
+
+
+class SpectrogramResultsCurve(MKIDResultsCurve):
+    """
+    Adds every power spectral density appended to the results to the
+    WaterfallItem given as waterfall as a row in dB instead of drawing it as
+    a line. The spectra are queued by the thread that appends them and
+    resampled by the next preparation, so the ones that are replaced before the
+    plot is refreshed (or while it is hidden) still get a row. Results that
+    aren't appended to (e.g. loaded from a file) add the spectrum that they
+    hold once.
+    """
+    _version = None
+
+    def __init__(self, *args, waterfall=None, **kwargs):
+        self.waterfall = waterfall
+        # spectra that haven't been drawn yet, older ones would be scrolled out anyway
+        self._records = collections.deque(maxlen=None if waterfall is None else waterfall.rows)
+        self._listened = False  # spectra were appended to the results
+        self._loaded = False  # the spectrum of results that aren't appended to was added
+        super().__init__(*args, **kwargs)
+        if hasattr(self.results, "listen"):
+            self.results.listen(self.add_record)
+
+    def add_record(self, record, clear=False):
+        """Queues the spectrum in a record of the results to be resampled by the next preparation."""
+        if self.waterfall is None or self.x not in record or self.y not in record:
+            return
+        self._listened = True
+        # copy the spectrum in case the procedure reuses its arrays
+        self._records.append((np.array(record[self.x], dtype=float), np.array(record[self.y], dtype=float)))
+
+    def _resample(self, x_data, y_data):
+        if len(x_data) <= 1 or len(x_data) != len(y_data):
+            return None
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y_data = 10 * np.log10(np.asarray(y_data, dtype=float))
+        return self.waterfall.resample(x_data, y_data)
+
+    def prepare(self):
+        if self.waterfall is None:
+            return None
+        if self.force_reload:
+            self.results.reload()
+        rows = []
+        while self._records:
+            row = self._resample(*self._records.popleft())
+            if row is not None:
+                rows.append(row)
+        if self._listened or self._loaded:
+            return {'rows': rows} if rows else None
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            version = (column_version(self.results, self.x), column_version(self.results, self.y))
+            if version == self._version and None not in version:
+                return None
+            x_data, y_data = column_data(self.results, self.x), column_data(self.results, self.y)
+        self._version = version
+        row = self._resample(x_data, y_data)
+        if row is None:
+            return None
+        self._loaded = None not in version  # pymeasure results are drawn again when they change
+        return {'rows': [row]}
+
+    def draw(self, prepared):
+        if prepared is not None:
+            for row in prepared['rows']:
+                self.waterfall.add_row(row)
+
+    def reset(self):
+        super().reset()
+        self._version = None
 
 
 class HistogramResultsCurve(MKIDResultsCurve):
-    """Extension of the pymeasure ResultsCurve class"""
+    """
+    Plots a histogram. If y is None, the x column holds the raw samples and the
+    probability density is accumulated from the newly appended samples on each
+    update. Otherwise x and y are the precomputed bin edges and counts.
+    """
+    _histogram = None
 
-    def update(self):
-        """Updates the data by polling the results"""
+    def prepare(self):
         if self.force_reload:
             self.results.reload()
-        data = self.results.data  # get the current snapshot
+
+        if self.y is None:
+            with getattr(self.results, "lock", contextlib.nullcontext()):
+                samples = column_data(self.results, self.x)
+            if self._histogram is None or len(samples) < self._histogram.n_samples:
+                self._histogram = StreamingHistogram()  # the column was cleared
+            elif len(samples) == self._histogram.n_samples:
+                return None
+            self._histogram.add(samples[self._histogram.n_samples:])
+            x_data, y_data = self._histogram.histogram(density=True)
+            if not len(x_data):
+                return None
+            return self.prepare_data(x_data, y_data, stepMode="center")
 
         # Set x-y data
-        x_data = data[self.x].copy()
-        y_data = data[self.y]
-        if len(x_data) == len(y_data) + 1:
-            self.setData(x_data, y_data, stepMode="center")
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            x_data, y_data = column_window(self.results, self.x), column_window(self.results, self.y)
+        if len(x_data) != len(y_data) + 1:
+            return None
+        return self.prepare_data(x_data, y_data, stepMode="center")
+
+    def reset(self):
+        super().reset()
+        self._histogram = None
+
+
+class OverviewResultsCurve:
+    """
+    Stand-in for a results curve that draws the x and y columns in a panel of
+    an OverviewItem instead of on a plot. It has the parts of the curve
+    interface that the manager and the windows use. The columns are only read
+    again when their version changes, so updating the panels of finished
+    experiments costs nothing.
+    """
+    def __init__(self, results, x, y, overview=None, force_reload=False, color=None, **kwargs):
+        self.results = results
+        self.x = x
+        self.y = y
+        self.overview = overview
+        self.force_reload = force_reload
+        self.file_name = None  # name of the experiment's data file, which the results are only a cache of
+        color = pg.intColor(0) if color is None else color
+        self.pen = pg.mkPen(color=color, width=kwargs.get('width', 1))
+        self.symbolBrush = None
+        self.opts = {'pen': self.pen, 'symbolBrush': pg.mkBrush(color)}
+        self._version = None
+
+    def update(self):
+        if self.overview is None:
+            return
+        if self.force_reload:
+            self.results.reload()
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            version = (column_version(self.results, self.x), column_version(self.results, self.y))
+            if version == self._version and None not in version and self in self.overview:
+                return
+            x_data, y_data = column_data(self.results, self.x), column_data(self.results, self.y)
+        if len(x_data) != len(y_data):  # the columns are being appended to
+            return
+        self._version = version
+        self.overview.set_panel(self, x_data, y_data, self.pen)
+
+    def finish(self):
+        pass  # the panel doesn't change once it shows the final data
+
+    def release(self):
+        pass  # the panel is kept while the experiment is hidden
+
+    def setPen(self, pen):
+        self.pen = self.opts['pen'] = pen
+        if self.overview is not None:
+            self.overview.set_pen(self, pen)
+
+    def setSymbolBrush(self, brush):
+        self.opts['symbolBrush'] = brush
+
+
+class HeatmapResultsCurve:
+    """
+    Stand-in for a results curve that puts one scalar result of an experiment
+    into the cell of a ParameterGrid given by its x and y procedure parameters.
+    The result is the first entry of the value column, which is how
+    ParametersWidget reads scalar and (value, error) results. changed is called
+    whenever the cell of the experiment changes.
+    """
+    def __init__(self, results, x, y, value=None, grid=None, changed=None, force_reload=False, color=None,
+                 **kwargs):
+        self.results = results
+        self.x = x
+        self.y = y
+        self.value = value
+        self.grid = grid
+        self.changed = changed
+        self.force_reload = force_reload
+        color = pg.intColor(0) if color is None else color
+        self.pen = pg.mkPen(color=color)
+        self.symbolBrush = None
+        self.opts = {'pen': self.pen, 'symbolBrush': pg.mkBrush(color)}
+        self._cell = None  # x, y and value last put into the grid
+
+    def update(self):
+        if self.grid is None or self.value is None:
+            return
+        if self.force_reload:
+            self.results.reload()
+        procedure = self.results.procedure
+        x = getattr(procedure, self.x, np.nan)
+        y = 0 if self.y is None else getattr(procedure, self.y, np.nan)
+        with getattr(self.results, "lock", contextlib.nullcontext()):
+            try:
+                data = column_data(self.results, self.value)
+                value = data[0] if len(data) else np.nan
+            except (TypeError, ValueError):  # the column doesn't hold numbers
+                value = np.nan
+        try:
+            cell = np.array([x, y, value], dtype=float)
+        except (TypeError, ValueError):  # not a number
+            cell = np.array([x, y, np.nan], dtype=float)
+        if self._cell is not None and np.array_equal(cell, self._cell, equal_nan=True) and self in self.grid:
+            return
+        self._cell = cell
+        self.grid.set(self, *cell)
+        if self.changed is not None:
+            self.changed()
+
+    def finish(self):
+        pass  # the cell is set by the update that the manager does when the experiment finishes
+
+    def release(self):
+        pass  # the cell is kept while the experiment is hidden
+
+    def setPen(self, pen):
+        self.pen = self.opts['pen'] = pen
+
+    def setSymbolBrush(self, brush):
+        self.opts['symbolBrush'] = brush
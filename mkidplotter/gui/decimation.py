@@ -0,0 +1,180 @@
+import copy
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class _Level:
+    """Arrays of one decimated level with room to append to without copying."""
+    def __init__(self):
+        self.buffers = [np.empty(0) for _ in range(4)]
+        self.size = 0
+
+    def truncate(self, size):
+        self.size = min(self.size, size)
+
+    def append(self, *arrays):
+        size = self.size + len(arrays[0])
+        if size > len(self.buffers[0]):
+            self.buffers = [np.concatenate((buffer[:self.size], np.empty(max(size, 2 * self.size))))
+                            for buffer in self.buffers]
+        for buffer, array in zip(self.buffers, arrays):
+            buffer[self.size:size] = array
+        self.size = size
+
+    def arrays(self):
+        return tuple(buffer[:self.size] for buffer in self.buffers)
+
+
+class LevelOfDetail:
+    """
+    Min/max pyramid of a trace with increasing x values. Queries return at most
+    two points per pixel column so that the cost of drawing the trace depends on
+    the size of the plot and not on the size of the data. If step is True, x
+    holds the len(y) + 1 bin edges of a stepMode="center" curve.
+
+    The full resolution data is only referenced, so memory mapped columns are
+    only read where the view is zoomed in far enough to need them. The pyramid
+    can be extended with samples appended to the trace without rebuilding it.
+    """
+    FACTOR = 4  # number of samples merged into one sample of the next level
+    MIN_SIZE = 512  # stop adding levels once they are this small
+    MAX_SIZE = 2**22  # coarsen the first decimated level when it gets longer than this
+    CHUNK = 2**22  # number of full resolution samples that are decimated at a time
+
+    def __init__(self, x=(), y=(), step=False):
+        self.step = step
+        self.monotonic = True
+        self.first_factor = self.FACTOR  # samples in each point of the first decimated level
+        self._decimated = []  # _Level buffers of the decimated levels
+        self.levels = []
+        self.extend(x, y)
+
+    @staticmethod
+    def is_monotonic(x):
+        """Returns True if the x values can be used to build a LevelOfDetail."""
+        x = np.asarray(x, dtype=float)
+        return bool(np.isfinite(x).all() and (np.diff(x) >= 0).all())
+
+    def extend(self, x, y):
+        """
+        Adds the samples at the end of x and y to the pyramid. The arrays must
+        start with the samples that were already added. Returns False if x is
+        not increasing, in which case the trace can't be decimated.
+        """
+        if not self.monotonic:
+            return False
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        size = len(self.levels[0][2]) if self.levels else 0
+        for start in range(max(size - 1, 0), len(x), self.CHUNK):
+            if not self.is_monotonic(x[start:start + self.CHUNK + 1]):
+                self.monotonic = False
+                return False
+        x_lo, x_hi = (x[:-1], x[1:]) if self.step else (x, x)
+        self.levels = [(x_lo, x_hi, y, y)]
+        if len(y) <= self.MIN_SIZE:
+            return True
+        # drop the finest decimated levels while they are too long to keep in memory
+        while len(y) > self.MAX_SIZE * self.first_factor:
+            if self._decimated:
+                self._decimated.pop(0)
+            self.first_factor *= self.FACTOR
+            size = 0 if not self._decimated else size
+        if not self._decimated:
+            self._decimated.append(_Level())
+            size = 0
+        # update the blocks of each level that changed, starting from the data
+        changed, factor, source = size, self.first_factor, self.levels[0]
+        for level in self._decimated:
+            changed //= factor
+            level.truncate(changed)
+            chunk = max(self.CHUNK // factor, 1) * factor
+            for start in range(changed * factor, len(source[0]), chunk):
+                level.append(*self._reduce(source, start, start + chunk, factor))
+            source, factor = level.arrays(), self.FACTOR
+        # add coarser levels until the last one is small
+        while len(source[0]) > self.MIN_SIZE:
+            level = _Level()
+            level.append(*self._reduce(source, 0, len(source[0]), self.FACTOR))
+            self._decimated.append(level)
+            source = level.arrays()
+        self.levels += [level.arrays() for level in self._decimated]
+        return True
+
+    @staticmethod
+    def _reduce(source, start, stop, factor):
+        x_lo, x_hi, y_min, y_max = [array[start:stop] for array in source]
+        index = np.arange(0, len(x_lo), factor)
+        last = np.minimum(index + factor, len(x_lo)) - 1
+        return x_lo[index], x_hi[last], np.fmin.reduceat(y_min, index), np.fmax.reduceat(y_max, index)
+
+    def copy(self):
+        """Returns a copy that can be queried while this one is extended."""
+        lod = copy.copy(self)
+        lod.levels = list(self.levels)
+        lod._decimated = []
+        return lod
+
+    @property
+    def x_range(self):
+        x_lo, x_hi = self.levels[0][:2]
+        return x_lo[0], x_hi[-1]
+
+    def _first_positive(self):
+        """Returns the smallest positive x value or None if there isn't one."""
+        values = [x[np.searchsorted(x, 0, side="right")] for x in self.levels[0][:2] if len(x) and x[-1] > 0]
+        return min(values) if values else None
+
+    def query(self, x_min, x_max, n_columns, log=False):
+        """
+        Returns the x and y data to draw between x_min and x_max on a plot that
+        is n_columns pixels wide. If log is True, the pixel columns are evenly
+        spaced in log10(x) and the x values at or below zero (e.g. the edges of
+        a DC bin) are moved to the first positive x value.
+        """
+        n_columns = max(int(n_columns), 1)
+        if log:
+            floor = self._first_positive()
+            if floor is None:  # nothing can be drawn on a log axis
+                return np.empty(0), np.empty(0)
+            x_min, x_max = max(x_min, floor), max(x_max, floor)
+        # find the coarsest level that still has two samples per pixel column
+        level, start, stop = None, 0, 0
+        for x_lo, x_hi, y_min, y_max in self.levels:
+            first = max(np.searchsorted(x_hi, x_min, side="left") - 1, 0)
+            last = min(np.searchsorted(x_lo, x_max, side="right") + 1, len(x_lo))
+            if level is not None and last - first < 2 * n_columns:
+                break
+            level, start, stop = (x_lo, x_hi, y_min, y_max), first, last
+        decimated = level[2] is not level[3]  # the full resolution level only needs binning when it's too long
+        x_lo, x_hi, y_min, y_max = [array[start:stop] for array in level]
+        if log:
+            x_lo, x_hi = np.maximum(x_lo, floor), np.maximum(x_hi, floor)
+        if (stop - start <= 2 * n_columns and not decimated) or not x_max > x_min:
+            x = np.append(x_lo, x_hi[-1:]) if self.step else x_lo
+            return x, y_min
+        # bin the samples of that level into pixel columns
+        if log:
+            position, x_min, x_max = np.log10(x_lo), np.log10(x_min), np.log10(x_max)
+        else:
+            position = x_lo
+        column = np.floor((position - x_min) / (x_max - x_min) * n_columns)
+        index = np.concatenate(([0], np.flatnonzero(np.diff(column)) + 1))
+        last = np.append(index[1:], len(x_lo)) - 1
+        y = np.empty(2 * len(index))
+        y[0::2] = np.fmax.reduceat(y_max, index)
+        y[1::2] = np.fmin.reduceat(y_min, index)
+        x = np.empty(2 * len(index) + self.step)
+        if self.step:  # split each column into a max step and a min step
+            x[0:-1:2] = x_lo[index]
+            if log:
+                x[1:-1:2] = np.sqrt(x_lo[index] * x_hi[last])
+            else:
+                x[1:-1:2] = (x_lo[index] + x_hi[last]) / 2
+            x[-1] = x_hi[-1]
+        else:
+            x[0::2] = x_lo[index]
+            x[1::2] = x_lo[last]
+        return x, y
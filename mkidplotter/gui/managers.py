@@ -1,6 +1,7 @@
 import logging
 from mkidplotter.gui.workers import Worker
 import pymeasure.display.manager as manager
+from pymeasure.display.Qt import QtCore
 from pymeasure.display.listeners import Monitor
 
 log = logging.getLogger(__name__)
@@ -9,12 +10,18 @@ log.addHandler(logging.NullHandler())
 
 class Manager(manager.Manager):
     """Extension of the pymeasure Manager class to allow for multiple plots."""
-    def load(self, experiment):
-        """ Load a previously executed Experiment
+    removed = QtCore.QSignal(object)
+
+    def load(self, experiment, finished=False):
+        """ Load an Experiment. The curves are only marked as finished if
+        finished is True (e.g. for data opened from a file) since queue() loads
+        the experiments that haven't run yet too.
         """
         for index, plot in enumerate(self.plot):
             for curve in experiment.curve[index]:
                 plot.addItem(curve)
+                if finished:
+                    curve.finish()
         self.browser.add(experiment)
         self.experiments.append(experiment)
 
@@ -27,6 +34,9 @@ class Manager(manager.Manager):
         for index, plot in enumerate(self.plot):
             for curve in experiment.curve[index]:
                 plot.removeItem(curve)
+                curve.release()  # drop the memory maps of the spilled columns before their files are deleted
+        self.removed.emit(experiment)
+        experiment.results.close()
 
     def next(self):
         """
@@ -71,6 +81,7 @@ class Manager(manager.Manager):
         for index, _ in enumerate(self.plot):
             for curve in experiment.curve[index]:
                 curve.update()
+                curve.finish()
         self.finished.emit(experiment)
         if self._is_continuous:  # Continue running procedures
             self.next()
@@ -7,6 +7,7 @@ from pymeasure.experiment import (IntegerParameter, FloatParameter, Parameter, V
 
 from mkidplotter.gui.inputs import FitInput
 from mkidplotter.gui.indicators import Indicator
+from mkidplotter.gui.timeseries import TimeSeriesStore
 from mkidplotter.gui.parameters import DirectoryParameter, FileParameter, TextEditParameter
 
 log = logging.getLogger(__name__)
@@ -80,6 +81,8 @@ class MKIDProcedure(Procedure):
     # optional daq from analogreadout connect to the class with connect_daq()
     daq = None
     TOOLTIPS = {}
+    # number of values kept for data columns that are streamed continuously (e.g. {"t": 100000, "i": 100000})
+    RING_COLUMNS = {}
     directory = None
 
     def __init__(self, *args, **kwargs):
@@ -223,6 +226,14 @@ class MKIDProcedure(Procedure):
                 handler.addFilter(lambda record: record.name != f)
         logger.addHandler(handler)
 
+    def setup_procedure_store(self, name='temperature', channels=1):
+        """Returns a binary time series store in the procedure directory for
+        readings (e.g. temperatures) that indicators can load at startup."""
+        if self.directory is None:
+            raise IOError("Cannot setup a procedure store if no directory "
+                          "parameter is provided.")
+        return TimeSeriesStore(self.directory, name=name, channels=channels)
+
 
 class SweepBaseProcedure(MKIDProcedure):
     """Procedure class to subclass when making a custom MKID sweep procedure."""
@@ -1,8 +1,12 @@
 import os
+import re
 import sys
 import pickle
 import logging
+import weakref
+import threading
 import importlib
+import numpy as np
 import pandas as pd
 from collections import OrderedDict
 
@@ -10,6 +14,7 @@ from pymeasure.experiment import Procedure
 import pymeasure.experiment.results as results
 
 from mkidplotter.gui.workers import coerce_to_list
+from mkidplotter.gui.timeseries import RingBuffer
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -24,6 +29,7 @@ class ResultsHolder:
 
     def __init__(self):
         self._files = OrderedDict()
+        self._columns = {}  # array copies of the columns of the loaded files
 
     def __getitem__(self, item):
         item = os.path.abspath(item)
@@ -46,29 +52,132 @@ class ResultsHolder:
         log.debug("saved to cache: {}".format(file_name))
         self._check_size()
 
+    def columns(self, file_name):
+        """Returns the dictionary of column arrays that are cached for a file."""
+        return self._columns.setdefault(file_name, {})
+
     def _check_size(self):
         for _ in range(max(len(self._files) - self.MAX_SIZE, 0)):
             key, value = self._files.popitem(last=False)
+            self._columns.pop(key, None)
             log.debug("removed from cache: {}".format(key))
             with open(key, "wb") as f:
                 pickle.dump(value, f)
             log.debug("saved to file: {}".format(key))
 
 
+class SpilledColumn:
+    """
+    Column of floats that is kept in a file next to the results instead of in
+    memory. Values are appended to the end of the file and read through a
+    memory map so that only the parts of the column that are used get loaded.
+    Pickling it only stores the file name.
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        if not os.path.isfile(file_name):
+            open(file_name, "wb").close()
+        self._map = np.empty(0)
+
+    def __len__(self):
+        return os.path.getsize(self.file_name) // 8
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __getitem__(self, item):
+        return self.array()[item]
+
+    def __iter__(self):
+        return iter(self.array())
+
+    def __getstate__(self):
+        return {"file_name": self.file_name}
+
+    def __setstate__(self, state):
+        self.__init__(state["file_name"])
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        with open(self.file_name, "ab") as f:
+            f.write(values.tobytes())
+
+    def array(self):
+        """Returns a read-only memory map of the column."""
+        size = len(self)
+        if len(self._map) != size:
+            self._map = np.memmap(self.file_name, dtype=np.float64, mode="r", shape=(size,)) if size else np.empty(0)
+        return self._map
+
+
+class RingColumn:
+    """
+    Column of floats that only keeps its newest capacity values for streams
+    that are plotted continuously. The values are held in a RingBuffer, so
+    appending to it never reallocates and array() doesn't copy them.
+    """
+    def __init__(self, capacity, values=()):
+        self._buffer = RingBuffer(capacity)
+        self.extend(values)
+
+    @property
+    def capacity(self):
+        return self._buffer.capacity
+
+    @property
+    def count(self):
+        """Returns the number of values appended so far including the dropped ones."""
+        return self._buffer.count
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __getitem__(self, item):
+        return self.array()[item]
+
+    def __iter__(self):
+        return iter(self.array())
+
+    def __getstate__(self):
+        return {"capacity": self.capacity, "values": np.array(self.array())}
+
+    def __setstate__(self, state):
+        self.__init__(state["capacity"], state["values"])
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values):
+            self._buffer.extend(values)
+
+    def array(self):
+        """Returns a read-only view of the values from the oldest to the newest."""
+        return self._buffer.view()[0]
+
+
 _results_cache = ResultsHolder()  # cache of already loaded files
 
 
 class Results(results.Results):
     """
     Results class for holding GUI results. It acts like a dictionary and uses
-    the ResultsHolder class to regulate memory management.
+    the ResultsHolder class to regulate memory management. Numeric columns
+    that grow past SPILL_SIZE values are moved to files next to the data file
+    so that traces larger than the available memory can be browsed. Columns in
+    the RING_COLUMNS dictionary of the procedure only keep their newest values.
     """
+    SPILL_SIZE = 1000000
 
     def __init__(self, procedure, data_filename):
         if not isinstance(procedure, Procedure):
             raise ValueError("Results require a Procedure object")
         self.procedure = procedure
         self.procedure_class = procedure.__class__
+        self.ring_columns = getattr(procedure, "RING_COLUMNS", {})  # number of values kept for each column
         self.parameters = procedure.parameter_objects()
 
         if isinstance(data_filename, (list, tuple)):
@@ -78,6 +187,12 @@ class Results(results.Results):
 
         self.data_filename = data_filename
         self.data_filenames = data_filenames
+        self._lock = threading.RLock()
+        self._versions = {}
+        self._resets = {}
+        self._unspillable = set()
+        self._spilled = set()  # files that columns were moved to
+        self._listeners = []  # weak references to the callbacks given to listen()
         self.data = {}
         self.formatter = None
 
@@ -99,11 +214,152 @@ class Results(results.Results):
             raise ValueError("data object must be set as a dictionary")
         data = {"_parameters": self.procedure.parameter_values(), "_class": self.procedure.__class__.__name__,
                 "_module": self.procedure.__module__, "_data_filename": self.data_filename}
-        data.update({key: [] for key in self.procedure.DATA_COLUMNS})
-        _results_cache.add(self.data_filename, data)
-        for key, value in dictionary.items():
-            if key in _results_cache[self.data_filename].keys():
-                _results_cache[self.data_filename][key] += coerce_to_list(value)
+        data.update({key: self._new_column(key) for key in self.procedure.DATA_COLUMNS})
+        with self._lock:
+            _results_cache.add(self.data_filename, data)
+            _results_cache.columns(self.data_filename).clear()
+            for key, value in dictionary.items():
+                if isinstance(value, (SpilledColumn, RingColumn)):
+                    _results_cache[self.data_filename][key] = value
+                elif key in _results_cache[self.data_filename].keys():
+                    column = _results_cache[self.data_filename][key]
+                    column += coerce_to_list(value)
+                    if isinstance(column, list) and len(column) > self.SPILL_SIZE:
+                        self._spill(key)
+            for key in data.keys():
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._resets[key] = self._resets.get(key, 0) + 1
+
+    def append(self, record, clear=False):
+        """
+        Appends a dictionary of column values to the data. The columns in the
+        record are replaced instead if clear is True.
+        """
+        with self._lock:
+            data = self.data
+            for key, value in record.items():
+                if key not in data.keys() or clear:
+                    data[key] = self._new_column(key)
+                    self._resets[key] = self._resets.get(key, 0) + 1
+                if isinstance(data[key], SpilledColumn):
+                    data[key].extend(value)
+                elif isinstance(data[key], RingColumn):
+                    data[key].extend(coerce_to_list(value))
+                    if data[key].count > data[key].capacity:
+                        # the oldest values were dropped so the column was not only appended to
+                        self._resets[key] = self._resets.get(key, 0) + 1
+                else:
+                    data[key] += coerce_to_list(value)
+                    if len(data[key]) > self.SPILL_SIZE and key not in self._unspillable:
+                        self._spill(key)
+                self._versions[key] = self._versions.get(key, 0) + 1
+        for reference in list(self._listeners):
+            callback = reference()
+            if callback is None:  # its object was deleted
+                self._listeners.remove(reference)
+                continue
+            try:
+                callback(record, clear)
+            except Exception:
+                log.exception("Could not pass the record to a results listener")
+
+    def listen(self, callback):
+        """
+        Calls callback(record, clear) with every record that is appended from
+        the thread that appends it, e.g. so that a curve can queue records that
+        are replaced before the plot is refreshed. The callback holds up the
+        procedure, so the work on the records should be left to the curve
+        preparation. Only a weak reference is kept to bound methods so that
+        listening doesn't keep their object alive.
+        """
+        if hasattr(callback, "__self__"):
+            self._listeners.append(weakref.WeakMethod(callback))
+        else:
+            self._listeners.append(lambda: callback)
+
+    def _new_column(self, key):
+        return RingColumn(self.ring_columns[key]) if key in self.ring_columns else []
+
+    @property
+    def lock(self):
+        """Lock that is held while the data is changed."""
+        return self._lock
+
+    def _spill(self, key):
+        """Moves a column into a file next to the data file."""
+        data = self.data
+        try:
+            values = np.asarray(data[key], dtype=np.float64)
+        except (TypeError, ValueError):
+            self._unspillable.add(key)  # not numeric so it has to stay in memory
+            return
+        file_name = "{}_{}.column".format(os.path.splitext(os.path.abspath(self.data_filename))[0],
+                                          re.sub(r"\W", "_", key))
+        if os.path.isfile(file_name):
+            os.remove(file_name)  # left over from a previous column with this name
+        column = SpilledColumn(file_name)
+        column.extend(values)
+        data[key] = column
+        self._spilled.add(file_name)
+        _results_cache.columns(self.data_filename).pop(key, None)
+        log.debug("moved column '{}' to {}".format(key, file_name))
+
+    def close(self):
+        """
+        Deletes the files that the columns were moved to. The spilled columns
+        can't be read afterwards, so it should only be called once the results
+        are no longer shown. Files that can't be deleted yet are tried again by
+        the next call.
+        """
+        with self._lock:
+            kept = set()
+            for file_name in self._spilled:
+                if os.path.isfile(file_name):
+                    try:
+                        os.remove(file_name)
+                        log.debug("deleted {}".format(file_name))
+                    except OSError:  # e.g. the file is still memory mapped on Windows
+                        kept.add(file_name)
+                        log.warning("could not delete {}".format(file_name))
+            self._spilled = kept
+
+    def version(self, key, reset=False):
+        """
+        Returns a number that changes every time the column is modified. If
+        reset is True, it only changes when the column is replaced instead of
+        appended to.
+        """
+        return (self._resets if reset else self._versions).get(key, 0)
+
+    def column(self, key):
+        """
+        Returns a read-only float array of the column. The array is cached until
+        the column changes so that all of the curves plotting a column share one
+        conversion, and only the new values are converted when it is appended to.
+        Spilled columns are returned as a memory map of their file and ring
+        columns as a view of their buffer.
+        """
+        with self._lock:
+            if isinstance(self.data[key], (SpilledColumn, RingColumn)):
+                return self.data[key].array()
+            columns = _results_cache.columns(self.data_filename)
+            version, reset = self.version(key), self.version(key, reset=True)
+            cached = columns.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[2]
+            values = self.data[key]
+            if cached is not None and cached[1] == reset:
+                buffer, size = cached[2].base, len(cached[2])
+            else:
+                buffer, size = np.empty(len(values)), 0
+            new = np.asarray(values[size:], dtype=float)
+            if size + len(new) > len(buffer):  # leave room to append to without copying
+                buffer = np.concatenate((buffer[:size], np.empty(max(size, len(new)))))
+            buffer[size:size + len(new)] = new
+            array = buffer[:size + len(new)]
+            array.flags.writeable = False
+            columns[key] = (version, reset, array)
+            return array
 
     def reload(self):
         pass  # doesn't need to be reloaded like pymeasure Results class
@@ -0,0 +1,137 @@
+import copy
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class SpatialIndex:
+    """
+    Index of the points of a growing curve for finding the point nearest to
+    the mouse. Traces with increasing x values are searched with a binary
+    search and everything else with a grid of cells. The cells of new points
+    are stored in sorted chunks that are merged as they grow, so adding points
+    only sorts the new ones (amortized) and a lookup is a binary search per
+    chunk.
+    """
+    GRID = 256  # number of cells across the data when the grid is made
+    MAX_CELLS = 1024  # search all of the points if a lookup spans more cells than this
+    MAX_POINTS = 10000000  # don't grid more points than this since the grid is kept in memory
+
+    def __init__(self):
+        self.x, self.y = np.empty(0), np.empty(0)
+        self.sorted = True  # the x values are increasing
+        self.chunks = []  # (sorted cell keys, point indices) of the indexed points
+        self.origin = None  # lower left corner of cell (0, 0)
+        self.cell = None  # cell width and height
+        self._bounds = (np.inf, -np.inf, np.inf, -np.inf)
+
+    def add(self, x, y):
+        """
+        Adds the new points at the end of x and y to the index. The arrays must
+        start with the points that were already indexed.
+        """
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        start = len(self.x)
+        self.x, self.y = x, y
+        if len(x) == start:
+            return
+        new_x = x[max(start - 1, 0):]
+        self.sorted = self.sorted and bool(np.all(np.diff(new_x) >= 0) and np.isfinite(new_x).all())
+        if self.sorted:
+            return
+        if len(x) > self.MAX_POINTS:
+            self.chunks, self.cell = [], None
+            return
+        if self.cell is None:
+            start = 0  # x stopped increasing so grid all of the points
+        # grow the grid bounds and remake the grid if the cells are now too small
+        finite = np.isfinite(x[start:]) & np.isfinite(y[start:])
+        if not finite.any():
+            return
+        new_x, new_y = x[start:][finite], y[start:][finite]
+        x_min, x_max, y_min, y_max = self._bounds
+        x_min, x_max = min(x_min, new_x.min()), max(x_max, new_x.max())
+        y_min, y_max = min(y_min, new_y.min()), max(y_max, new_y.max())
+        self._bounds = (x_min, x_max, y_min, y_max)
+        if self.cell is None or (x_max - x_min) / self.cell[0] > 4 * self.GRID \
+                or (y_max - y_min) / self.cell[1] > 4 * self.GRID:
+            span = np.array([x_max - x_min, y_max - y_min])
+            span[~(span > 0)] = 1.
+            self.origin, self.cell = np.array([x_min, y_min]), span / self.GRID
+            self.chunks, start = [], 0
+        self._add_chunk(start)
+
+    def _keys(self, column, row):
+        offset = 8 * self.GRID  # the grid is remade before the cells reach this far
+        return (np.clip(column, -offset, offset) + offset) * (2 * offset + 1) + np.clip(row, -offset, offset) + offset
+
+    def _add_chunk(self, start):
+        index = np.arange(start, len(self.x))
+        index = index[np.isfinite(self.x[start:]) & np.isfinite(self.y[start:])]
+        column = np.floor((self.x[index] - self.origin[0]) / self.cell[0]).astype(np.int64)
+        row = np.floor((self.y[index] - self.origin[1]) / self.cell[1]).astype(np.int64)
+        keys = self._keys(column, row)
+        order = np.argsort(keys, kind="stable")
+        self.chunks.append((keys[order], index[order]))
+        # merge chunks of similar size so that there are only log(n) of them
+        while len(self.chunks) > 1 and len(self.chunks[-1][0]) * 2 >= len(self.chunks[-2][0]):
+            (keys2, index2), (keys1, index1) = self.chunks.pop(), self.chunks.pop()
+            keys, index = np.concatenate((keys1, keys2)), np.concatenate((index1, index2))
+            order = np.argsort(keys, kind="stable")
+            self.chunks.append((keys[order], index[order]))
+
+    def copy(self):
+        index = copy.copy(self)
+        index.chunks = list(self.chunks)
+        return index
+
+    def nearest(self, x, y, x_scale, y_scale, radius, log_x=False, log_y=False):
+        """
+        Returns the index of the point closest to (x, y) within radius or None.
+        Distances are measured after dividing x and y by their scales (e.g. in
+        pixels by using the data size of a pixel). If log_x or log_y is True,
+        that coordinate, its scale and the distances are in log10 space while
+        the index stays in linear space. The logarithm keeps the order of the
+        points, so the search box is only transformed back.
+        """
+        if not len(self.x):
+            return None
+        x_radius, y_radius = radius * x_scale, radius * y_scale
+        x_low, x_high, y_low, y_high = x - x_radius, x + x_radius, y - y_radius, y + y_radius
+        if log_x:
+            x_low, x_high = 10**x_low, 10**x_high
+        if log_y:
+            y_low, y_high = 10**y_low, 10**y_high
+        if self.sorted:
+            start, stop = np.searchsorted(self.x, [x_low, x_high])
+            if stop - start > self.MAX_POINTS:
+                return None
+            candidates = np.arange(start, stop)
+        elif self.cell is None:
+            return None
+        else:
+            first = np.floor((np.array([x_low, y_low]) - self.origin) / self.cell).astype(np.int64)
+            last = np.floor((np.array([x_high, y_high]) - self.origin) / self.cell).astype(np.int64)
+            if np.prod(last - first + 1) > self.MAX_CELLS:
+                candidates = np.arange(len(self.x))
+            else:
+                columns = np.arange(first[0], last[0] + 1)
+                low, high = self._keys(columns, first[1]), self._keys(columns, last[1])
+                candidates = []
+                for keys, index in self.chunks:
+                    starts, stops = np.searchsorted(keys, low, side="left"), np.searchsorted(keys, high, side="right")
+                    candidates.extend(index[start:stop] for start, stop in zip(starts, stops) if stop > start)
+                candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=int)
+        if not len(candidates):
+            return None
+        x_data, y_data = self.x[candidates], self.y[candidates]
+        with np.errstate(divide="ignore", invalid="ignore"):  # points at or below zero aren't drawn in log mode
+            x_data = np.log10(x_data) if log_x else x_data
+            y_data = np.log10(y_data) if log_y else y_data
+        distance = ((x_data - x) / x_scale)**2 + ((y_data - y) / y_scale)**2
+        closest = np.nanargmin(distance) if np.isfinite(distance).any() else None
+        if closest is None or distance[closest] > radius**2:
+            return None
+        return candidates[closest]
@@ -0,0 +1,272 @@
+import copy
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class StreamingHistogram:
+    """
+    Histogram of a growing number of samples that only needs the new samples to
+    update. The bins start out spanning the first samples and merge in pairs
+    whenever a sample falls outside of them, so the number of bins is fixed and
+    adding a sample costs the same no matter how many came before it.
+    """
+    BINS = 64  # must be even so that neighboring bins can be merged
+
+    def __init__(self, bins=None):
+        self.bins = self.BINS if bins is None else bins
+        if self.bins % 2:
+            raise ValueError("the number of bins must be even")
+        self.counts = np.zeros(self.bins)
+        self.start = None  # lower edge of the first bin
+        self.width = None  # bin width
+        self.n_samples = 0  # number of samples added including non-finite ones
+        self._constant = (None, 0)  # samples held back until the data has a spread
+
+    def add(self, samples):
+        """Adds the samples to the histogram."""
+        samples = np.asarray(samples, dtype=float).ravel()
+        self.n_samples += samples.size
+        samples = samples[np.isfinite(samples)]
+        if not samples.size:
+            return
+        x_min, x_max = samples.min(), samples.max()
+        if self.width is None:
+            # wait for two different values to set the initial bin width
+            value, count = self._constant
+            if value is not None:
+                x_min, x_max = min(x_min, value), max(x_max, value)
+            if x_min == x_max:
+                self._constant = (x_min, count + samples.size)
+                return
+            if count:
+                samples = np.append(samples, np.full(count, value))
+            self._constant = (None, 0)
+            self.start, self.width = x_min, (x_max - x_min) / self.bins
+        self._grow(x_min, x_max)
+        index = np.floor((samples - self.start) / self.width).astype(int)
+        self.counts += np.bincount(np.clip(index, 0, self.bins - 1), minlength=self.bins)
+
+    def _grow(self, x_min, x_max):
+        """Doubles the bin width until the bins cover x_min and x_max."""
+        while x_min < self.start or x_max > self.start + self.bins * self.width:
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            empty = np.zeros(self.bins // 2)
+            if x_min < self.start:
+                self.start -= self.bins * self.width
+                self.counts = np.concatenate((empty, merged))
+            else:
+                self.counts = np.concatenate((merged, empty))
+            self.width *= 2
+
+    def histogram(self, density=False):
+        """
+        Returns the bin edges and the counts (or the probability density) with
+        the empty bins at either end removed.
+        """
+        value, count = self._constant
+        if self.width is None:
+            if value is None:
+                return np.array([]), np.array([])
+            return np.array([value - 0.5, value + 0.5]), np.array([1. if density else count])
+        filled = np.flatnonzero(self.counts)
+        first, last = filled[0], filled[-1] + 1
+        edges = self.start + self.width * np.arange(first, last + 1)
+        counts = self.counts[first:last]
+        if density:
+            counts = counts / (counts.sum() * self.width)
+        return edges, counts
+
+
+class StreamingHistogram2D:
+    """
+    Two dimensional version of StreamingHistogram. Each axis has a fixed number
+    of bins that merge in pairs whenever a point falls outside of them, so
+    adding points only needs the new ones.
+    """
+    BINS = 256  # bins per axis, must be even so that neighboring bins can be merged
+
+    def __init__(self, bins=None):
+        self.bins = self.BINS if bins is None else bins
+        if self.bins % 2:
+            raise ValueError("the number of bins must be even")
+        self.counts = np.zeros((self.bins, self.bins))  # indexed by [x bin, y bin]
+        self.start = None  # lower edges of the first x and y bins
+        self.width = None  # x and y bin widths
+        self.n_samples = 0  # number of points added including non-finite ones
+        self._held = (np.empty(0), np.empty(0))  # points held back until the data has a spread
+
+    def add(self, x, y):
+        """Adds the points to the histogram."""
+        x, y = np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel()
+        self.n_samples += x.size
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y = x[finite], y[finite]
+        if not x.size:
+            return
+        if self.width is None:
+            # wait for the points to spread out in x and y to set the initial bin widths
+            x, y = np.append(self._held[0], x), np.append(self._held[1], y)
+            if x.min() == x.max() or y.min() == y.max():
+                self._held = (x, y)
+                return
+            self._held = (np.empty(0), np.empty(0))
+            self.start = np.array([x.min(), y.min()])
+            self.width = np.array([np.ptp(x), np.ptp(y)]) / self.bins
+        for axis, values in enumerate((x, y)):
+            self._grow(axis, values.min(), values.max())
+        column = np.clip(np.floor((x - self.start[0]) / self.width[0]).astype(int), 0, self.bins - 1)
+        row = np.clip(np.floor((y - self.start[1]) / self.width[1]).astype(int), 0, self.bins - 1)
+        counts = np.bincount(column * self.bins + row, minlength=self.bins**2)
+        self.counts += counts.reshape(self.bins, self.bins)
+
+    def _grow(self, axis, v_min, v_max):
+        """Doubles the bin width of an axis until the bins cover v_min and v_max."""
+        while v_min < self.start[axis] or v_max > self.start[axis] + self.bins * self.width[axis]:
+            counts = np.moveaxis(self.counts, axis, 0)
+            merged = counts.reshape(self.bins // 2, 2, self.bins).sum(axis=1)
+            empty = np.zeros_like(merged)
+            if v_min < self.start[axis]:
+                self.start[axis] -= self.bins * self.width[axis]
+                counts = np.concatenate((empty, merged))
+            else:
+                counts = np.concatenate((merged, empty))
+            self.counts = np.moveaxis(counts, 0, axis)
+            self.width[axis] *= 2
+
+    def image(self):
+        """
+        Returns a copy of the counts and the rectangle (x, y, width, height)
+        that they cover or None if the bins haven't been set yet.
+        """
+        if self.width is None:
+            return None
+        return self.counts.copy(), (self.start[0], self.start[1], self.bins * self.width[0],
+                                    self.bins * self.width[1])
+
+
+class EnsembleBand:
+    """
+    Median and percentile band of many curves. The curves are interpolated
+    onto the x values of the first one and kept as the rows of one array, so
+    adding a curve only interpolates that curve and the statistics of all of
+    them are computed in one vectorized pass. If log is True, the curves are
+    interpolated in log10(x).
+    """
+    PERCENTILES = (16, 50, 84)  # lower edge of the band, median, upper edge of the band
+
+    def __init__(self, log=False):
+        self.log = log
+        self.x = None  # common x grid
+        self.keys = []  # key of the curve in each row
+        self._rows = np.empty((0, 0))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key, x, y):
+        """Adds or replaces the curve with the given key."""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        if self.log:
+            finite &= x > 0
+        x, y = x[finite], y[finite]
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+        if self.x is None:
+            if not len(x):
+                return
+            self.x = x
+            self._rows = np.empty((4, len(x)))
+        grid, x = (np.log10(self.x), np.log10(x)) if self.log else (self.x, x)
+        row = np.interp(grid, x, y, left=np.nan, right=np.nan) if len(x) else np.full(len(grid), np.nan)
+        if key in self.keys:
+            self._rows[self.keys.index(key)] = row
+            return
+        if len(self.keys) == len(self._rows):  # leave room to add to without copying
+            self._rows = np.concatenate((self._rows, np.empty_like(self._rows)))
+        self._rows[len(self.keys)] = row
+        self.keys.append(key)
+
+    def remove(self, key):
+        if key not in self.keys:
+            return
+        index = self.keys.index(key)
+        self._rows[index:len(self.keys) - 1] = self._rows[index + 1:len(self.keys)]
+        self.keys.pop(index)
+
+    def bands(self):
+        """
+        Returns the x grid and the lower edge, median and upper edge of the
+        band at each x value where at least one curve is defined.
+        """
+        rows = self._rows[:len(self.keys)]
+        count = np.isfinite(rows).sum(axis=0)
+        defined = count > 0
+        # np.nanpercentile loops over the columns, so sort them all at once instead (NaNs sort to the end)
+        rows, count = np.sort(rows[:, defined], axis=0), count[defined]
+        columns = np.arange(rows.shape[1])
+        bands = []
+        for percentile in self.PERCENTILES:
+            position = (count - 1) * percentile / 100
+            below = np.floor(position).astype(int)
+            above = np.minimum(below + 1, count - 1)
+            weight = position - below
+            bands.append(rows[below, columns] * (1 - weight) + rows[above, columns] * weight)
+        return (self.x[defined],) + tuple(bands)
+
+
+class RunningBounds:
+    """
+    Range and a random sample of the finite values of a growing array. Only the
+    new values need to be added to update them, and the sample is used to
+    estimate the percentiles of the data.
+    """
+    SAMPLE_SIZE = 1000
+
+    def __init__(self):
+        self.size = 0  # number of values added including non-finite ones
+        self.count = 0  # number of finite values added
+        self.min, self.max = np.inf, -np.inf
+        self.sample = np.empty(0)
+
+    def add(self, values):
+        """Adds the values to the bounds."""
+        values = np.asarray(values, dtype=float)
+        self.size += len(values)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+        # reservoir sampling: each value ends up in the sample with equal probability
+        fill = min(self.SAMPLE_SIZE - len(self.sample), len(values))
+        if fill:
+            self.sample = np.append(self.sample, values[:fill])
+        rest = values[fill:]
+        if len(rest):
+            seen = self.count + fill + np.arange(1, len(rest) + 1)
+            index = (np.random.random_sample(len(rest)) * seen).astype(int)
+            keep = index < self.SAMPLE_SIZE
+            self.sample[index[keep]] = rest[keep]
+        self.count += len(values)
+
+    def bounds(self, frac=1.0):
+        """
+        Returns the minimum and maximum or, if frac is less than one, the
+        percentiles containing that fraction of the data.
+        """
+        if not self.count:
+            return None
+        if frac >= 1.0:
+            return self.min, self.max
+        return tuple(np.percentile(self.sample, [50 * (1 - frac), 50 * (1 + frac)]))
+
+    def copy(self):
+        bounds = copy.copy(self)
+        bounds.sample = self.sample.copy()
+        return bounds
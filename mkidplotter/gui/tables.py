@@ -0,0 +1,132 @@
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class ParameterGrid:
+    """
+    Scalar results of many experiments on the grid of their swept parameters.
+    The x and y parameters and the result of each experiment are kept as the
+    columns of one array. image() maps the parameter values to grid indices
+    and averages the results in each cell with one np.bincount() over all of
+    the experiments, so redrawing the grid doesn't loop over its cells.
+    """
+    def __init__(self):
+        self.keys = []  # key of the experiment in each column
+        self._index = {}  # key -> column
+        self._data = np.empty((3, 0))  # x, y and the result of each experiment
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def set(self, key, x, y, value):
+        """Adds or replaces the result of the experiment with the given key."""
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.keys)
+            self.keys.append(key)
+            if index == self._data.shape[1]:  # leave room to add to without copying
+                self._data = np.concatenate((self._data, np.empty((3, max(index, 16)))), axis=1)
+        self._data[:, index] = x, y, value
+
+    def remove(self, key):
+        index = self._index.pop(key, None)
+        if index is None:
+            return
+        last = self.keys.pop()
+        if last != key:  # fill the hole with the last column
+            self._data[:, index] = self._data[:, len(self.keys)]
+            self.keys[index], self._index[last] = last, index
+
+    def image(self):
+        """
+        Returns the sorted x values, the sorted y values and the mean result of
+        each cell as an array of shape (len(x), len(y)) with NaN for the cells
+        without a finite result.
+        """
+        x, y, values = self._data[:, :len(self.keys)]
+        keep = np.isfinite(x) & np.isfinite(y)
+        x_values, x_index = np.unique(x[keep], return_inverse=True)
+        y_values, y_index = np.unique(y[keep], return_inverse=True)
+        cells, values = x_index * len(y_values) + y_index, values[keep]
+        finite = np.isfinite(values)
+        size = len(x_values) * len(y_values)
+        sums = np.bincount(cells[finite], weights=values[finite], minlength=size)
+        counts = np.bincount(cells[finite], minlength=size)
+        with np.errstate(invalid="ignore"):
+            mean = np.where(counts > 0, sums / counts, np.nan)
+        return x_values, y_values, mean.reshape(len(x_values), len(y_values))
+
+
+class FitTable:
+    """
+    Fit results of many experiments as one array column per name, e.g. the
+    (value, error) pairs of each fit parameter and the procedure parameters
+    that were swept, so that any column can be plotted against any other
+    without looping over the experiments. Values that an experiment doesn't
+    have are NaN.
+    """
+    def __init__(self):
+        self.keys = []  # key of the experiment in each row
+        self._index = {}  # key -> row
+        self._values = {}  # name -> array of the values
+        self._errors = {}  # name -> array of the errors
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    @property
+    def names(self):
+        return list(self._values)
+
+    def set(self, key, values, errors=None):
+        """Adds or replaces the row of key from dictionaries of the values and errors by name."""
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.keys)
+            self.keys.append(key)
+        size = len(next(iter(self._values.values()), ()))
+        if index == size:  # leave room to add to without copying
+            size = max(2 * size, 16)
+            for columns in (self._values, self._errors):
+                for name, column in columns.items():
+                    columns[name] = np.append(column, np.full(size - len(column), np.nan))
+        for columns in (self._values, self._errors):
+            for column in columns.values():
+                column[index] = np.nan
+        for columns, new in ((self._values, values), (self._errors, errors or {})):
+            for name, value in new.items():
+                if name not in self._values:
+                    self._values[name], self._errors[name] = np.full(size, np.nan), np.full(size, np.nan)
+                columns[name][index] = value
+
+    def remove(self, key):
+        index = self._index.pop(key, None)
+        if index is None:
+            return
+        last = self.keys.pop()
+        if last != key:  # fill the hole with the last row
+            for columns in (self._values, self._errors):
+                for column in columns.values():
+                    column[index] = column[len(self.keys)]
+            self.keys[index], self._index[last] = last, index
+
+    def column(self, name):
+        """Returns the values of a column with NaN for the rows that don't have it."""
+        if name not in self._values:
+            return np.full(len(self.keys), np.nan)
+        return self._values[name][:len(self.keys)]
+
+    def errors(self, name):
+        """Returns the errors of a column with NaN for the rows that don't have them."""
+        if name not in self._errors:
+            return np.full(len(self.keys), np.nan)
+        return self._errors[name][:len(self.keys)]
@@ -0,0 +1,230 @@
+import os
+import re
+import logging
+import threading
+import numpy as np
+from datetime import datetime, timezone
+
+from mkidplotter.gui.decimation import LevelOfDetail
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class RingBuffer:
+    """
+    Preallocated circular buffer of float columns that can be appended to from
+    any thread. Every row is written twice, once in each half of the buffer, so
+    that the newest rows are always one contiguous slice and view() never has
+    to copy them. Rows beyond the capacity are kept as a reserve so that a view
+    stays valid until that many more rows have been appended.
+    """
+    RESERVE = 0.25  # fraction of the capacity that can be appended before a view is overwritten
+
+    def __init__(self, capacity, columns=1):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError("the capacity must be at least one")
+        self._size = self.capacity + max(int(self.capacity * self.RESERVE), 1)
+        self._data = np.full((columns, 2 * self._size), np.nan)
+        self._lock = threading.Lock()
+        self.count = 0  # number of rows appended so far
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def extend(self, *columns):
+        """Appends the values of each column."""
+        values = np.atleast_2d(np.array(columns, dtype=float))
+        if len(values) != len(self._data):
+            raise ValueError("expected {} columns but got {}".format(len(self._data), len(values)))
+        with self._lock:
+            skipped = max(values.shape[1] - self._size, 0)  # would be overwritten right away
+            values = values[:, skipped:]
+            index = (self.count + skipped + np.arange(values.shape[1])) % self._size
+            self._data[:, index] = values
+            self._data[:, index + self._size] = values
+            self.count += skipped + values.shape[1]
+
+    def append(self, *values):
+        """Appends one row."""
+        self.extend(*[[value] for value in values])
+
+    def pop(self):
+        """Removes the newest row so that it can be replaced."""
+        with self._lock:
+            self.count = max(self.count - 1, 0)
+
+    def view(self):
+        """Returns a read-only view of the rows from the oldest to the newest."""
+        with self._lock:
+            size = len(self)
+            start = (self.count - size) % self._size
+            view = self._data[:, start:start + size]
+        view.flags.writeable = False
+        return view
+
+
+class TimeSeries:
+    """
+    Time series for plotting a long history at a fixed cost. The newest
+    capacity samples are kept at full resolution and the min/max envelope of
+    the data is kept in coarser levels that each merge FACTOR samples of the
+    previous one, so every level has the same size but covers a longer time.
+    query() uses the coarsest level that still resolves the plotted time span,
+    and only returns views of the buffers if the samples don't need to be
+    binned. The samples must be appended in increasing order of time.
+    """
+    FACTOR = 4  # number of samples of a level merged into one sample of the next one
+
+    def __init__(self, capacity=2**14, levels=6):
+        self._lock = threading.Lock()
+        self._levels = [RingBuffer(capacity, columns=2)]
+        self._levels += [RingBuffer(capacity, columns=4) for _ in range(levels - 1)]
+        # rows of the previous level that don't fill a block of the next one yet
+        self._pending = [(np.empty(0),) * 4 for _ in range(levels - 1)]
+        self._partial = [False] * (levels - 1)  # the newest row of a level is an incomplete block
+
+    def __len__(self):
+        return self._levels[0].count
+
+    def extend(self, x, y):
+        """Appends the samples in x and y."""
+        x, y = np.atleast_1d(np.asarray(x, dtype=float)), np.atleast_1d(np.asarray(y, dtype=float))
+        with self._lock:
+            self._levels[0].extend(x, y)
+            new, partial = (x, x, y, y), None
+            for index, level in enumerate(self._levels[1:]):
+                rows = tuple(np.concatenate((pending, array)) for pending, array in zip(self._pending[index], new))
+                complete = len(rows[0]) // self.FACTOR
+                source = rows if partial is None else tuple(np.append(r, p) for r, p in zip(rows, partial))
+                if not len(source[0]):
+                    break
+                if self._partial[index]:
+                    level.pop()
+                reduced = LevelOfDetail._reduce(source, 0, len(source[0]), self.FACTOR)
+                level.extend(*reduced)
+                self._partial[index] = len(reduced[0]) > complete
+                self._pending[index] = tuple(array[complete * self.FACTOR:] for array in rows)
+                new = tuple(array[:complete] for array in reduced)
+                partial = tuple(array[complete:] for array in reduced) if self._partial[index] else None
+
+    def append(self, x, y):
+        """Appends one sample."""
+        self.extend([x], [y])
+
+    def backfill(self, store, start=None, stop=None, channel=0):
+        """
+        Appends the samples of one channel of a TimeSeriesStore between start
+        and stop that are newer than the samples already in the series.
+        """
+        x, values = store.query(start=start, stop=stop)
+        x_range = self.x_range
+        if x_range is not None:
+            newer = x > x_range[1]
+            x, values = x[newer], values[:, newer]
+        if len(x):
+            self.extend(x, values[channel])
+
+    def data(self):
+        """Returns read-only views of the full resolution samples that are still kept."""
+        return tuple(self._levels[0].view())
+
+    @property
+    def x_range(self):
+        """Returns the times of the oldest and the newest sample that are kept."""
+        with self._lock:
+            views = [level.view() for level in self._levels]
+        if not views[0].shape[1]:
+            return None
+        oldest = min(view[0, 0] for view in views if view.shape[1])
+        return oldest, views[0][0, -1]
+
+    def query(self, x_min, x_max, n_columns):
+        """
+        Returns the x and y data to draw between x_min and x_max on a plot that
+        is n_columns pixels wide.
+        """
+        with self._lock:
+            views = [level.view() for level in self._levels]
+        if not views[0].shape[1]:
+            return np.empty(0), np.empty(0)
+        x, y = views[0]
+        levels = [(x, x, y, y)] + [tuple(view) for view in views[1:]]
+        # the finer levels may have dropped the start of the time span already
+        for index, (level, ring) in enumerate(zip(levels, self._levels)):
+            if ring.count <= ring.capacity or level[0][0] <= x_min or index == len(levels) - 1:
+                break
+        lod = LevelOfDetail()
+        lod.levels = [level for level in levels[index:] if len(level[0])]
+        return lod.query(x_min, x_max, n_columns)
+
+
+class TimeSeriesStore:
+    """
+    Append-only binary file store of a time series with one or more value
+    channels. Each row is a float64 timestamp followed by the channel values
+    and is written with a single append so that several threads or processes
+    can write to the same store. The rows are split into one file per UTC day
+    so that a time range query only reads the days that it overlaps.
+    """
+    def __init__(self, directory, name="temperature", channels=1):
+        self.directory = directory
+        self.name = name
+        self.channels = channels
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def file_name(self, day):
+        """Returns the file holding the rows of the day (days since the epoch)."""
+        date = datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.directory, "{}_{}.series".format(self.name, date))
+
+    def days(self):
+        """Returns the sorted days that have a file in the store."""
+        pattern = re.compile(r"{}_(\d{{4}}-\d{{2}}-\d{{2}})\.series$".format(re.escape(self.name)))
+        days = []
+        for file_name in os.listdir(self.directory):
+            match = pattern.match(file_name)
+            if match:
+                date = datetime.strptime(match.group(1), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                days.append(int(date.timestamp() // 86400))
+        return sorted(days)
+
+    def extend(self, timestamps, *values):
+        """Appends the timestamps and the values of each channel at those times."""
+        rows = np.array((timestamps,) + values, dtype=np.float64, ndmin=2).T
+        if rows.shape[1] != self.channels + 1:
+            raise ValueError("expected {} channels but got {}".format(self.channels, rows.shape[1] - 1))
+        days = np.floor(rows[:, 0] / 86400).astype(int)
+        with self._lock:
+            for day in np.unique(days):
+                with open(self.file_name(day), "ab") as f:
+                    f.write(rows[days == day].tobytes())
+
+    def append(self, timestamp, *values):
+        """Appends the channel values at one time."""
+        self.extend([timestamp], *[[value] for value in values])
+
+    def query(self, start=None, stop=None):
+        """
+        Returns the timestamps between start and stop and an array of the
+        channel values at those times with one row per channel.
+        """
+        width = self.channels + 1
+        chunks = []
+        for day in self.days():
+            if (start is not None and (day + 1) * 86400 <= start) or (stop is not None and day * 86400 > stop):
+                continue
+            data = np.fromfile(self.file_name(day), dtype=np.float64)
+            chunks.append(data[:len(data) // width * width].reshape(-1, width))  # skip a partly written row
+        rows = np.concatenate(chunks) if chunks else np.empty((0, width))
+        keep = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            keep &= rows[:, 0] >= start
+        if stop is not None:
+            keep &= rows[:, 0] <= stop
+        rows = rows[keep]
+        if np.any(np.diff(rows[:, 0]) < 0):  # different writers can append out of order
+            rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        return rows[:, 0], rows[:, 1:].T
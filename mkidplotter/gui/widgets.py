@@ -1,5 +1,6 @@
 import os
 import copy
+import time
 import logging
 import threading
 import numpy as np
@@ -9,15 +10,22 @@ from datetime import datetime
 from functools import partial
 import pyqtgraph.graphicsItems.LegendItem as li
 from pyqtgraph.graphicsItems.ScatterPlotItem import drawSymbol
+from pyqtgraph.graphicsItems.GradientEditorItem import Gradients
 from pymeasure.experiment import Results
 import pymeasure.display.widgets as widgets
 from pymeasure.display.Qt import QtCore, QtGui
-from pymeasure.display.curves import Crosshairs
+from pymeasure.display.curves import Crosshairs, ResultsCurve
 from pymeasure.display.inputs import IntegerInput, BooleanInput, ListInput, StringInput
-from pymeasure.experiment import FloatParameter, IntegerParameter, BooleanParameter, ListParameter, Parameter
+from pymeasure.experiment import Procedure, FloatParameter, IntegerParameter, BooleanParameter, ListParameter, Parameter
 
 from mkidplotter.gui.displays import StringDisplay, FloatDisplay
-from mkidplotter.gui.curves import MKIDResultsCurve, NoiseResultsCurve, HistogramResultsCurve, ParameterResultsCurve
+from mkidplotter.gui.curves import (MKIDResultsCurve, NoiseResultsCurve, HistogramResultsCurve, ParameterResultsCurve,
+                                    DensityResultsCurve, PersistenceResultsCurve, BatchedCurveItem,
+                                    SpectrogramResultsCurve, WaterfallItem, OverviewItem, OverviewResultsCurve,
+                                    HeatmapResultsCurve)
+from mkidplotter.gui.tables import ParameterGrid, FitTable
+from mkidplotter.gui.statistics import EnsembleBand
+from mkidplotter.gui.timeseries import TimeSeries
 from mkidplotter.gui.parameters import FileParameter, DirectoryParameter, TextEditParameter
 from mkidplotter.gui.indicators import Indicator, FloatIndicator, BooleanIndicator, IntegerIndicator
 from mkidplotter.gui.inputs import (FileInput, DirectoryInput, FloatTextEditInput, NoiseInput, BooleanListInput,
@@ -235,6 +243,118 @@ class ParametersWidget(QtGui.QWidget):
                 break
 
 
+class ParameterTrendWidget(ParametersWidget):
+    """
+    ParametersWidget with a second tab that plots a fit parameter of every
+    experiment against one of its procedure parameters (e.g. Qi against the
+    temperature), with error bars for (value, error) results. The results are
+    collected into the columns of a FitTable as the fits finish, so the plot is
+    redrawn with one scatter and one error bar item per fit parameter instead of
+    one item per experiment. Experiments stay in the plot while their rows are
+    hidden and leave it when they are removed.
+    """
+    def __init__(self, columns, parent=None, x_axes=None, x_label=None, **kwargs):
+        self.table = FitTable()
+        self.fit_names = list(dict.fromkeys(name for names in x_axes for name in names))
+        self.parameter_names = []  # numeric procedure parameters seen so far
+        self._items = {}  # fit parameter -> its scatter and error bar items
+        self._rows = {}  # results -> values and errors of the row of the experiment
+        self._redraw = QtCore.QTimer()
+        self._redraw.setSingleShot(True)
+        self._redraw.timeout.connect(self.update_trend)
+        super().__init__(columns, parent=parent, x_axes=x_axes, x_label=x_label, **kwargs)
+
+    def _setup_ui(self):
+        super()._setup_ui()
+        self.plot.clear = self.clear
+        self.columns_x = QtGui.QComboBox(self)
+        self.columns_x.activated.connect(self.update_trend)
+        self.columns_y = QtGui.QComboBox(self)
+        self.columns_y.addItems(self.fit_names)
+        self.columns_y.activated.connect(self.update_trend)
+        self.trend_widget = pg.PlotWidget(background='w')
+        self.trend = self.trend_widget.getPlotItem()
+
+    def _layout(self):
+        trend = QtGui.QWidget()
+        vbox = QtGui.QVBoxLayout(trend)
+        hbox = QtGui.QHBoxLayout()
+        hbox.addWidget(self.columns_y)
+        hbox.addWidget(QtGui.QLabel("vs"))
+        hbox.addWidget(self.columns_x)
+        hbox.addStretch()
+        vbox.addLayout(hbox)
+        vbox.addWidget(self.trend_widget)
+        self.tabs = QtGui.QTabWidget()
+        self.tabs.addTab(self.plot, "Table")
+        self.tabs.addTab(trend, "Trend")
+        vbox = QtGui.QVBoxLayout(self)
+        vbox.addWidget(self.tabs)
+        self.setLayout(vbox)
+
+    def addItem(self, curve):
+        super().addItem(curve)
+        # each experiment has one row that its curves fill with the fit parameters they show
+        values, errors = self._rows.setdefault(curve.results, ({}, {}))
+        for name in curve.x:
+            try:
+                result = curve.results.data[name]
+            except KeyError:
+                continue
+            if not len(result) or isinstance(result[0], str):
+                continue
+            if isinstance(result, (list, tuple)) and len(result) == 2:  # (value, error)
+                values[name], errors[name] = result
+            else:
+                values[name] = result[0]
+        for name, value in curve.results.procedure.parameter_values().items():
+            if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+                values.setdefault(name, value)
+                if name not in self.parameter_names:
+                    self.parameter_names.append(name)
+                    self.columns_x.addItem(name)
+        self.table.set(curve.results, values, errors)
+        self._redraw.start()
+
+    def remove_curves(self, curves):
+        """Removes the results of an experiment from the table and the trend plot."""
+        for curve in curves:
+            self.removeItem(curve)
+            self.table.remove(curve.results)
+            self._rows.pop(curve.results, None)
+        self._redraw.start()
+
+    def clear(self):
+        QtGui.QTreeWidget.clear(self.plot)
+        self.curves = []
+        for results in list(self.table.keys):
+            self.table.remove(results)
+        self._rows = {}
+        self._redraw.start()
+
+    def update_trend(self):
+        x_name, y_name = self.columns_x.currentText(), self.columns_y.currentText()
+        if y_name and y_name not in self._items:
+            items = (pg.ScatterPlotItem(pen=None, brush=pg.intColor(0), size=6),
+                     pg.ErrorBarItem(pen=pg.mkPen(pg.intColor(0)), beam=0))
+            for item in items:
+                self.trend.addItem(item)
+            self._items[y_name] = items
+        for name, items in self._items.items():
+            for item in items:
+                item.setVisible(name == y_name)
+        if not x_name or not y_name:
+            return
+        self.trend.setLabel('bottom', x_name)
+        self.trend.setLabel('left', y_name)
+        x, y, error = self.table.column(x_name), self.table.column(y_name), self.table.errors(y_name)
+        finite = np.isfinite(x) & np.isfinite(y)
+        scatter, error_bars = self._items[y_name]
+        scatter.setData(x[finite], y[finite])
+        finite &= np.isfinite(error)
+        error_bars.setData(x=x[finite], y=y[finite], height=2 * error[finite])
+
+
 class BrowserWidget(widgets.BrowserWidget):
     def _layout(self):
         vbox = QtGui.QVBoxLayout(self)
@@ -258,9 +378,71 @@ class BrowserWidget(widgets.BrowserWidget):
         return QtCore.QSize(0, 300)
 
 
+class PlotFrame(widgets.PlotFrame):
+    """
+    PlotFrame that doesn't update its curves while it is hidden (e.g. in a
+    background tab). The curves that missed an update are updated once when the
+    frame is shown again. The coordinates label also shows the data point
+    nearest to the mouse. The lines of finished experiments can be drawn
+    together by the batch item.
+    """
+    HOVER_RADIUS = 10  # pixels
+    def __init__(self, *args, **kwargs):
+        self._stale = []  # curves that would have been updated while hidden
+        super().__init__(*args, **kwargs)
+        self.batch = BatchedCurveItem()
+        self.plot.vb.addItem(self.batch, ignoreBounds=True)  # the curves still report their own bounds
+
+    def update_curves(self):
+        for item in self.plot.items:
+            if isinstance(item, ResultsCurve):
+                if not self.check_status or item.results.procedure.status == Procedure.RUNNING:
+                    if self.isVisible():
+                        item.update()
+                    elif item not in self._stale:
+                        self._stale.append(item)
+
+    def update_coordinates(self, x, y):
+        point = self.nearest_point(x, y)
+        if point is None:
+            super().update_coordinates(x, y)
+        else:
+            self.coordinates.setText("(%g, %g)  nearest point: (%g, %g)" % (x, y, point[0], point[1]))
+
+    def nearest_point(self, x, y):
+        """Returns the plotted data point closest to (x, y) within HOVER_RADIUS pixels or None."""
+        x_scale, y_scale = self.plot.vb.viewPixelSize()
+        if not (x_scale > 0 and y_scale > 0):
+            return None
+        nearest, distance = None, np.inf
+        for item in self.plot.items:
+            if isinstance(item, MKIDResultsCurve) and item.isVisible():
+                point = item.nearest(x, y, x_scale, y_scale, self.HOVER_RADIUS)
+                if point is not None:
+                    d = ((point[0] - x) / x_scale)**2 + ((point[1] - y) / y_scale)**2
+                    if d < distance:
+                        nearest, distance = point, d
+        return nearest
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        stale, self._stale = self._stale, []
+        for item in stale:
+            if item in self.plot.items:
+                item.update()
+
+
 class PlotWidget(widgets.PlotWidget):
     """Base class for all plot widgets. Only determines the user interface and layout."""
+    DECIMATE = False  # draw long monotonic traces at the resolution of the plot
+    POINT_CLOUD_THRESHOLD = 10000  # draw symbols as plain points for curves longer than this (None to disable)
+    CACHE_FINISHED = True  # render the curves of finished experiments once per view instead of every repaint
+    BATCH_FINISHED = True  # draw the lines of all finished experiments with one item
+    ENSEMBLE = False  # experiments can be summarized by a median line and a percentile band
+
     def _setup_ui(self):
+        self._styles = {}  # curve options shared by the curves of each style in the cycle
+        self._ensemble = []  # EnsembleBand and its plot items for each curve of an experiment
         self.columns_x = QtGui.QComboBox(self)
         self.columns_y = QtGui.QComboBox(self)
         self.columns_x.hide()
@@ -279,7 +461,7 @@ class PlotWidget(widgets.PlotWidget):
             y_label = self.y_axes if isinstance(self.y_axes, str) else self.y_axes[0]
         else:
             y_label = self.y_label
-        self.plot_frame = widgets.PlotFrame(x_label, y_label, self.refresh_time,
+        self.plot_frame = PlotFrame(x_label, y_label, self.refresh_time,
                                             self.check_status)
         self.updated = self.plot_frame.updated
         self.plot = self.plot_frame.plot
@@ -304,23 +486,82 @@ class PlotWidget(widgets.PlotWidget):
     def new_curve(self, results, **kwargs):
         curve = []
         for index, _ in enumerate(self.x_axes):
-            # overwrite cycler with kwargs
-            cycled_args = next(self.cycler)
-            cycled_args.update(kwargs)
-            # need to get copies of the QObjects otherwise they will be overwritten later
-            cycled_args = copy_options(cycled_args)
-            if 'color' not in cycled_args.keys():
-                cycled_args.update({'color': pg.intColor(0)})
-            if 'pen' not in cycled_args:
-                cycled_args['pen'] = pg.mkPen(color=cycled_args['color'], width=2)
-            if 'antialias' not in cycled_args:
-                cycled_args['antialias'] = False
-
-            curve.append(self.curve_class(results, x=self.x_axes[index],
-                                          y=self.y_axes[index], **cycled_args))
+            style = next(self.cycler)
+            # The curves of a style share one set of options so that queueing
+            # many experiments doesn't create new pens and brushes for each one.
+            # The cycler repeats the same dictionaries, so they identify the style.
+            # Anything that changes a curve's pen or brush must replace it instead.
+            key = id(style)
+            if kwargs or key not in self._styles:
+                # overwrite cycler with kwargs
+                cycled_args = dict(style, **kwargs)
+                # need to get copies of the QObjects otherwise they will be overwritten later
+                cycled_args = copy_options(cycled_args)
+                if 'color' not in cycled_args.keys():
+                    cycled_args.update({'color': pg.intColor(0)})
+                if 'pen' not in cycled_args:
+                    cycled_args['pen'] = pg.mkPen(color=cycled_args['color'], width=2)
+                if 'antialias' not in cycled_args:
+                    cycled_args['antialias'] = False
+                if not kwargs:
+                    self._styles[key] = cycled_args
+            else:
+                cycled_args = dict(self._styles[key])
+
+            curve.append(self.curve_class(results, x=self.x_axes[index], y=self.y_axes[index],
+                                          decimate=self.DECIMATE,
+                                          point_cloud_threshold=self.POINT_CLOUD_THRESHOLD,
+                                          cache_finished=self.CACHE_FINISHED,
+                                          batch=self.plot_frame.batch if self.BATCH_FINISHED else None,
+                                          **cycled_args))
 
         return curve
 
+    def in_ensemble(self, results):
+        return bool(self._ensemble) and results in self._ensemble[0][0]
+
+    def add_to_ensemble(self, curves):
+        """Adds the data of an experiment's curves to the ensemble bands."""
+        log_mode = self.plot.getAxis("bottom").logMode
+        for index, curve in enumerate(curves):
+            if index == len(self._ensemble):
+                foreground = pg.mkColor(pg.getConfigOption('foreground'))
+                band = pg.mkColor(foreground)
+                band.setAlpha(60)
+                # the edges of the band are only used by the fill so they aren't drawn
+                edges = pg.PlotDataItem(pen=pg.mkPen(None)), pg.PlotDataItem(pen=pg.mkPen(None))
+                items = (pg.FillBetweenItem(*edges, brush=pg.mkBrush(band)),
+                         pg.PlotDataItem(pen=pg.mkPen(foreground, width=2)))
+                for item in edges + items:
+                    self.plot.addItem(item)
+                self._ensemble.append((EnsembleBand(log=log_mode), edges, items))
+            x, y = curve.ensemble_data()
+            self._ensemble[index][0].add(curve.results, x, y)
+        self.update_ensemble()
+
+    def remove_from_ensemble(self, results):
+        for band, _, _ in self._ensemble:
+            band.remove(results)
+        self.update_ensemble()
+
+    def clear_ensemble(self):
+        for _, edges, items in self._ensemble:
+            for item in edges + items:
+                self.plot.removeItem(item)
+        self._ensemble = []
+
+    def update_ensemble(self):
+        """Redraws the median lines and percentile bands."""
+        for band, edges, items in self._ensemble:
+            if not len(band):
+                for item in edges + (items[1],):
+                    item.setData([], [])
+                continue
+            x, low, median, high = band.bands()
+            edges[0].setData(x, low)
+            edges[1].setData(x, high)
+            items[1].setData(x, median)
+
 
 class FitPlotWidget(PlotWidget):
     """Plot widget for an IQ sweep fit"""
@@ -391,6 +632,8 @@ class SweepPlotWidget(PlotWidget):
 
 
 class TransmissionPlotWidget(FitPlotWidget):
+    ENSEMBLE = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.plot.setAspectLocked(False)
@@ -398,6 +641,9 @@ class TransmissionPlotWidget(FitPlotWidget):
 
 class PulsePlotWidget(PlotWidget):
     """Plot widget for pulse IQ data"""
+    DECIMATE = True
+    PERSISTENCE = False  # draw every trace so far as an image behind the latest one
+
     def __init__(self, *args, color_cycle=None, x_axes=None, y_axes=None, x_label=None,
                  y_label=None, legend_text=None, **kwargs):
         self.x_axes = x_axes
@@ -424,11 +670,22 @@ class PulsePlotWidget(PlotWidget):
         self.style_cycle = (cycler(**self.line_style) * n)[:len(self.x_axes)]
         self.cycler = (color_cycle * self.style_cycle)()
         super().__init__(*args, **kwargs)
+        if self.PERSISTENCE:
+            self.curve_class = PersistenceResultsCurve
         self.plot.setAspectLocked(True)
 
 
 class TracePlotWidget(PlotWidget):
-    """Plot widget for pulse IQ data"""
+    """
+    Plot widget for pulse IQ data. With SCROLLING set, the traces are drawn as
+    lines like on an oscilloscope. If the procedure keeps the plotted columns
+    in RING_COLUMNS, the plot scrolls along with the newest samples of the
+    stream while the memory and the redraw time stay fixed.
+    """
+    DECIMATE = True
+    PERSISTENCE = False  # draw every trace so far as an image behind the latest one
+    SCROLLING = False  # draw lines instead of symbols for continuous streams
+
     def __init__(self, *args, color_cycle=None, x_axes=None, y_axes=None, x_label=None,
                  y_label=None, legend_text=None, **kwargs):
         self.x_axes = x_axes
@@ -451,10 +708,18 @@ class TracePlotWidget(PlotWidget):
                                           self._point_size, self._point_size,
                                           self._point_size],
                            "pxMode": [True, True, True, True, True]}
+        if self.SCROLLING:
+            self.line_style = {"pen": [pg.mkPen(color='k', width=1),
+                                       pg.mkPen(color='k', width=1, style=QtCore.Qt.DashLine),
+                                       pg.mkPen(color='k', width=1, style=QtCore.Qt.DotLine),
+                                       pg.mkPen(color='k', width=1, style=QtCore.Qt.DashDotLine),
+                                       pg.mkPen(color='k', width=1, style=QtCore.Qt.DashDotDotLine)]}
         n = int(np.ceil(len(self.x_axes) / len(self.line_style["pen"])))
         self.style_cycle = (cycler(**self.line_style) * n)[:len(self.x_axes)]
         self.cycler = (color_cycle * self.style_cycle)()
         super().__init__(*args, **kwargs)
+        if self.PERSISTENCE:
+            self.curve_class = PersistenceResultsCurve
 
 
 class ScatterPlotWidget(PlotWidget):
@@ -479,6 +744,8 @@ class ScatterPlotWidget(PlotWidget):
         color_cycle = cycler(color=[tuple(list(value) + [50]) for value in color_cycle.by_key()['color']])
         self.cycler = (color_cycle * self.style_cycle)()
         super().__init__(*args, **kwargs)
+        # switch to a density image for long pulse runs
+        self.curve_class = DensityResultsCurve
 
 
 class HistogramPlotWidget(PlotWidget):
@@ -503,6 +770,9 @@ class HistogramPlotWidget(PlotWidget):
 
 class NoisePlotWidget(PlotWidget):
     """Plot widget for noise"""
+    DECIMATE = True
+    ENSEMBLE = True
+
     def __init__(self, *args, color_cycle=None, x_axes=None, y_axes=None, x_label=None,
                  y_label=None, legend_text=None, **kwargs):
         self.x_axes = x_axes
@@ -531,14 +801,286 @@ class NoisePlotWidget(PlotWidget):
         self.curve_class = NoiseResultsCurve
 
 
+class SpectrogramPlotWidget(PlotWidget):
+    """
+    Plot widget for how noise evolves over time or across sweep steps. Every
+    new PSD of the first x and y column pair is added to a waterfall image as
+    a row of log spaced frequency bins, with the newest one on top. LEVELS can
+    be set to fix the color range in dB.
+    """
+    ROWS = 1000  # number of spectra shown
+    BINS = 512  # number of frequency bins
+    LEVELS = None  # color range in dB or None to follow the data
+
+    def __init__(self, *args, color_cycle=None, x_axes=None, y_axes=None, x_label=None,
+                 y_label=None, legend_text=None, **kwargs):
+        self.x_axes = x_axes
+        self.y_axes = y_axes
+        self.x_label = x_label
+        self.y_label = "spectrum #" if y_label is None else y_label
+        self.legend_text = None  # the spectra are not drawn as lines
+        self._point_size = 6
+        self.line_style = {"pen": [pg.mkPen(None)]}
+        n = len(self.x_axes)
+        self.style_cycle = (cycler(**self.line_style) * n)[:len(self.x_axes)]
+        self.cycler = (color_cycle * self.style_cycle)()
+        super().__init__(*args, **kwargs)
+        self.plot.setLogMode(True, False)
+        self.waterfall = WaterfallItem(rows=self.ROWS, bins=self.BINS, levels=self.LEVELS)
+        self.plot.addItem(self.waterfall)
+        self.curve_class = SpectrogramResultsCurve
+
+    def new_curve(self, results, **kwargs):
+        curve = super().new_curve(results, **kwargs)
+        curve[0].waterfall = self.waterfall
+        return curve
+
+
+class OverviewPlotWidget(QtGui.QWidget):
+    """
+    Plot widget for screening many experiments at a glance, e.g. the IQ loops
+    or |S21| traces of every tone in a large frequency list. Each experiment
+    gets a small panel without axes in one grid that is drawn by a single
+    OverviewItem, and only the first x and y column pair is shown. The panels of
+    hidden experiments are grayed out but stay in the grid until the experiment
+    is removed. Hovering over a panel shows its file name, and the grid can be
+    zoomed to look at a part of it.
+    """
+    COLUMNS = None  # number of panels per row or None for a square grid
+    EQUAL_ASPECT = False  # scale x and y of each panel equally (e.g. for IQ loops)
+
+    def __init__(self, columns, parent=None, x_axes=None, y_axes=None, x_label=None, y_label=None,
+                 color_cycle=None, refresh_time=0.2, check_status=True, **kwargs):
+        super().__init__(parent)
+        self.columns = columns
+        self.x_axes = x_axes
+        self.y_axes = y_axes
+        x_label = x_axes[0] if x_label is None else x_label
+        y_label = y_axes[0] if y_label is None else y_label
+        self.title = "{} vs {}".format(y_label if isinstance(y_label, str) else y_label[0],
+                                       x_label if isinstance(x_label, str) else x_label[0])
+        self.cycler = color_cycle() if color_cycle is not None else None
+        self.check_status = check_status
+        self.curves = []
+        self._setup_ui()
+        self._layout()
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self.update_curves)
+        self.timer.start(int(refresh_time * 1e3))
+
+    def _setup_ui(self):
+        self.view = pg.GraphicsLayoutWidget()
+        self.view.setBackground('w')
+        self.view_box = self.view.addViewBox()
+        self.view_box.setAspectLocked(True)
+        self.overview = OverviewItem(columns=self.COLUMNS, equal_aspect=self.EQUAL_ASPECT)
+        self.view_box.addItem(self.overview)
+        self.view.scene().sigMouseMoved.connect(self.update_coordinates)
+        self.coordinates = QtGui.QLabel(self)
+        self.coordinates.setMinimumSize(QtCore.QSize(0, 20))
+        self.coordinates.setText(self.title)
+        self.coordinates.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignTrailing | QtCore.Qt.AlignVCenter)
+        # the manager and the windows add and remove the curves through plot
+        self.plot = self
+
+    def _layout(self):
+        vbox = QtGui.QVBoxLayout(self)
+        vbox.setSpacing(0)
+        vbox.addWidget(self.view)
+        vbox.addWidget(self.coordinates)
+        self.setLayout(vbox)
+
+    def new_curve(self, results, **kwargs):
+        if self.cycler is not None and 'color' not in kwargs:
+            kwargs['color'] = next(self.cycler)['color']
+        return [OverviewResultsCurve(results, x=self.x_axes[0], y=self.y_axes[0], overview=self.overview,
+                                     **kwargs)]
+
+    def addItem(self, curve):
+        if curve not in self.curves:
+            self.curves.append(curve)
+        self.overview.set_dimmed(curve, False)
+
+    def removeItem(self, curve):
+        """Grays out the panel of a hidden experiment. remove_curves() drops it."""
+        if curve in self.curves:
+            self.curves.remove(curve)
+        self.overview.set_dimmed(curve, True)
+
+    def remove_curves(self, curves):
+        """Removes the panels of an experiment."""
+        for curve in curves:
+            self.removeItem(curve)
+            self.overview.remove(curve)
+
+    def clear(self):
+        self.curves = []
+        self.overview.clear()
+
+    def update_curves(self):
+        if not self.isVisible():
+            return
+        for curve in self.curves:
+            if not self.check_status or curve.results.procedure.status == Procedure.RUNNING:
+                curve.update()
+
+    def update_coordinates(self, position):
+        point = self.view_box.mapSceneToView(position)
+        point = self.overview.mapFromView(point)
+        curve = self.overview.panel_at(point.x(), point.y())
+        if curve is None:
+            self.coordinates.setText(self.title)
+        else:
+            file_name = curve.file_name or os.path.basename(curve.results.data_filename)
+            self.coordinates.setText("{}: {}".format(self.title, file_name))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_curves()  # the running experiment was not updated while hidden
+
+
+class HeatmapPlotWidget(QtGui.QWidget):
+    """
+    Plot widget for a scalar result (e.g. a fit Qi or a noise level) as a
+    function of two swept procedure parameters, e.g. the attenuation and field
+    of a SweepGUI sweep grid. The first x and y axes name the parameters (y can
+    be None for a single row) and the result is picked from the data columns
+    with the combo box. Each cell shows the mean result of the experiments at
+    that grid point, e.g. of every tone in the frequency list, and the whole
+    grid is drawn as one image that is redrawn once for all of the experiments
+    that changed since the last redraw. The cells are assumed to be evenly
+    spaced, as they are in a SweepGUI sweep. Hidden experiments stay in the map
+    until they are removed.
+    """
+    VALUE = None  # data column shown first or None for the first column
+
+    def __init__(self, columns, parent=None, x_axes=None, y_axes=None, x_label=None, y_label=None, **kwargs):
+        super().__init__(parent)
+        self.columns = columns
+        self.x_axes = x_axes
+        self.y_axes = y_axes
+        self.x_label = x_axes[0] if x_label is None else x_label
+        self.y_label = y_axes[0] if y_label is None else y_label
+        self.value = self.VALUE if self.VALUE is not None else columns[0]
+        self.grid = ParameterGrid()
+        self.curves = []
+        self._cells = None  # x values, y values and results of the drawn image
+        self._redraw = QtCore.QTimer()
+        self._redraw.setSingleShot(True)
+        self._redraw.timeout.connect(self.update_image)
+        self._setup_ui()
+        self._layout()
+
+    def _setup_ui(self):
+        self.columns_value = QtGui.QComboBox(self)
+        for column in self.columns:
+            self.columns_value.addItem(column)
+        self.columns_value.setCurrentIndex(self.columns.index(self.value))
+        self.columns_value.activated.connect(self.update_value)
+        self.plot_widget = pg.PlotWidget(background='w')
+        self.plot_item = self.plot_widget.getPlotItem()
+        self.plot_item.setLabel('bottom', self.x_label if isinstance(self.x_label, str) else self.x_label[0])
+        if self.y_axes[0] is not None:
+            self.plot_item.setLabel('left', self.y_label if isinstance(self.y_label, str) else self.y_label[0])
+        self.image = pg.ImageItem()
+        self.plot_item.addItem(self.image)
+        ticks = Gradients['viridis']['ticks']
+        color_map = pg.ColorMap([tick[0] for tick in ticks], [tick[1] for tick in ticks])
+        self.color_bar = pg.ColorBarItem(cmap=color_map, interactive=False, pen='k')
+        self.color_bar.setImageItem(self.image, insert_in=self.plot_item)
+        self.coordinates = QtGui.QLabel(self)
+        self.coordinates.setMinimumSize(QtCore.QSize(0, 20))
+        self.coordinates.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignTrailing | QtCore.Qt.AlignVCenter)
+        self.plot_widget.scene().sigMouseMoved.connect(self.update_coordinates)
+        # the manager and the windows add and remove the curves through plot
+        self.plot = self
+
+    def _layout(self):
+        vbox = QtGui.QVBoxLayout(self)
+        vbox.setSpacing(0)
+        hbox = QtGui.QHBoxLayout()
+        hbox.addWidget(QtGui.QLabel("result:"))
+        hbox.addWidget(self.columns_value)
+        hbox.addStretch()
+        vbox.addLayout(hbox)
+        vbox.addWidget(self.plot_widget)
+        vbox.addWidget(self.coordinates)
+        self.setLayout(vbox)
+
+    def new_curve(self, results, **kwargs):
+        return [HeatmapResultsCurve(results, x=self.x_axes[0], y=self.y_axes[0], value=self.value, grid=self.grid,
+                                    changed=self._redraw.start, **kwargs)]
+
+    def addItem(self, curve):
+        if curve not in self.curves:
+            self.curves.append(curve)
+            if curve.results.procedure.status != Procedure.QUEUED:  # queued experiments don't have results yet
+                curve.update()
+
+    def removeItem(self, curve):
+        pass  # hidden experiments stay in the map until remove_curves()
+
+    def remove_curves(self, curves):
+        """Removes the results of an experiment from the map."""
+        for curve in curves:
+            if curve in self.curves:
+                self.curves.remove(curve)
+            self.grid.remove(curve)
+        self._redraw.start()
+
+    def clear(self):
+        for curve in self.curves:
+            self.grid.remove(curve)
+        self.curves = []
+        self._redraw.start()
+
+    def update_value(self, index):
+        self.value = self.columns[index]
+        for curve in self.curves:
+            curve.value = self.value
+            curve.update()
+
+    def update_image(self):
+        x, y, values = self.grid.image()
+        if not np.isfinite(values).any():
+            self._cells = None
+            self.image.clear()
+            return
+        self._cells = x, y, values
+        low, high = np.nanmin(values), np.nanmax(values)
+        self.image.setImage(values, autoLevels=False)
+        self.color_bar.setLevels((low, high) if high > low else (low - 0.5, high + 0.5))
+        # each value is at the center of its cell
+        width = (x[-1] - x[0]) / (len(x) - 1) if len(x) > 1 else 1
+        height = (y[-1] - y[0]) / (len(y) - 1) if len(y) > 1 else 1
+        self.image.setRect(QtCore.QRectF(x[0] - width / 2, y[0] - height / 2, width * len(x), height * len(y)))
+
+    def update_coordinates(self, position):
+        if self._cells is None:
+            self.coordinates.setText("")
+            return
+        point = self.plot_item.vb.mapSceneToView(position)
+        x, y, values = self._cells
+        column = np.abs(x - point.x()).argmin()
+        row = np.abs(y - point.y()).argmin()
+        self.coordinates.setText("({:g}, {:g})  {}: {:g}".format(x[column], y[row], self.value, values[column, row]))
+
+
 class TimeAxisItem(pg.AxisItem):
     def tickStrings(self, values, scale, spacing):
         return [datetime.fromtimestamp(value).strftime("%H:%M:%S") for value in values]
 
 
 class TimePlotIndicator(QtGui.QFrame):
-    """Plot widget for plotting data over a long time. Intended for use as a persistent indicator."""
-    def __init__(self, data_x, data_y, title='', refresh_time=2, **kwargs):
+    """
+    Plot widget for plotting data over a long time. Intended for use as a
+    persistent indicator. The data is either a TimeSeries, which is decimated
+    to the width of the plot, or the x and y data as sequences (e.g. deques).
+    If a TimeSeriesStore is given, the last history seconds of one of its
+    channels are added to the data when the indicator is created.
+    """
+    def __init__(self, data_x, data_y=None, title='', refresh_time=2, store=None, channel=0, history=24 * 3600,
+                 **kwargs):
         super().__init__(**kwargs)
         self.setAutoFillBackground(False)
         self.setStyleSheet("background: #fff")
@@ -548,6 +1090,8 @@ class TimePlotIndicator(QtGui.QFrame):
 
         self.data_x = data_x
         self.data_y = data_y
+        if store is not None:
+            self.backfill(store, channel=channel, history=history)
 
         self.coordinates = QtGui.QLabel(self)
         self.coordinates.setMinimumSize(QtCore.QSize(0, 20))
@@ -560,6 +1104,9 @@ class TimePlotIndicator(QtGui.QFrame):
         self.curve = self.plot.plot(pen='k')
         self.crosshairs = Crosshairs(self.plot, pen=pg.mkPen(color='#AAAAAA', style=QtCore.Qt.DashLine))
         self.crosshairs.coordinates.connect(self.update_coordinates)
+        self.plot.vb.sigXRangeChanged.connect(self._x_range_changed)
+        self._channels = [(self.data_x, self.data_y, self.curve)]  # data and curve of each plotted series
+        self._counts = None  # number of samples in each time series when they were last drawn
 
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update)
@@ -571,7 +1118,40 @@ class TimePlotIndicator(QtGui.QFrame):
         self.setLayout(vbox)
 
     def update(self):
-        self.curve.setData(x=list(self.data_x), y=list(self.data_y))
+        counts = [len(data_x) if isinstance(data_x, TimeSeries) else None for data_x, _, _ in self._channels]
+        drawn = self._counts or [None] * len(counts)
+        self._counts = counts
+        for (data_x, data_y, curve), count, last in zip(self._channels, counts, drawn):
+            if count is None or count != last:  # only redraw the channels with new samples
+                self._draw(data_x, data_y, curve)
+
+    def _draw(self, data_x, data_y, curve):
+        if isinstance(data_x, TimeSeries):
+            x_range = data_x.x_range
+            if x_range is None:
+                return
+            if not self.plot.vb.autoRangeEnabled()[0]:
+                x_range = self.plot.vb.viewRange()[0]
+            x, y = data_x.query(*x_range, self.plot.vb.width())
+            curve.setData(x=x, y=y)
+        else:
+            curve.setData(x=list(data_x), y=list(data_y))
+
+    def backfill(self, store, channel=0, history=24 * 3600):
+        """Adds the last history seconds of a channel of a TimeSeriesStore to the data."""
+        if isinstance(self.data_x, TimeSeries):
+            self.data_x.backfill(store, start=time.time() - history, channel=channel)
+            return
+        x, values = store.query(start=time.time() - history)
+        newer = x > self.data_x[-1] if len(self.data_x) else slice(None)
+        self.data_x.extend(x[newer])
+        self.data_y.extend(values[channel][newer])
+
+    def _x_range_changed(self):
+        # a time series is only drawn at the resolution of the view so zooming needs new data
+        if isinstance(self.data_x, TimeSeries) and not self.plot.vb.autoRangeEnabled()[0]:
+            self._counts = None
+            self.update()
 
     def update_coordinates(self, x, y):
         try:
@@ -583,6 +1163,60 @@ class TimePlotIndicator(QtGui.QFrame):
         return QtCore.QSize(0, 300)
 
 
+class MultiTimePlotIndicator(TimePlotIndicator):
+    """
+    Time plot indicator for several sensors. The series dictionary maps the
+    name of each channel to its TimeSeries, and all of the channels are drawn
+    on one plot that is refreshed by one timer. Channels named in the axes
+    dictionary are drawn against their own y axis with that label instead of
+    the shared one, except for the first channel, which labels the shared axis.
+    If a TimeSeriesStore is given, its channels are used to backfill the series
+    in order.
+    """
+    def __init__(self, series, title='', refresh_time=2, axes=None, store=None, history=24 * 3600, **kwargs):
+        names = list(series.keys())
+        super().__init__(series[names[0]], title=title, refresh_time=refresh_time, **kwargs)
+        if store is not None:
+            for channel, data in enumerate(series.values()):
+                data.backfill(store, start=time.time() - history, channel=channel)
+        axes = {} if axes is None else axes
+        legend = self.plot.addLegend()
+        self._views = []
+        self._channels = []
+        for index, name in enumerate(names):
+            pen = pg.mkPen(pg.intColor(index, hues=max(len(names), 1), maxValue=200))
+            if index == 0:  # the x range of the plot follows the first channel
+                curve = self.curve
+                curve.setPen(pen)
+                if name in axes:
+                    self.plot.setLabel('left', axes[name])
+            else:
+                curve = pg.PlotDataItem(pen=pen)
+            if name in axes and index > 0:
+                view_box = pg.ViewBox()
+                axis = pg.AxisItem('right')
+                axis.setPen(pen)
+                axis.setLabel(axes[name])
+                self.plot.layout.addItem(axis, 2, 3 + len(self._views))
+                self.plot.scene().addItem(view_box)
+                axis.linkToView(view_box)
+                view_box.setXLink(self.plot)
+                view_box.addItem(curve)
+                self._views.append(view_box)
+            elif index > 0:
+                self.plot.addItem(curve)
+            legend.addItem(curve, name)
+            self._channels.append((series[name], None, curve))
+        self.plot.vb.sigResized.connect(self._update_views)
+        self._update_views()
+
+    def _update_views(self):
+        # the extra view boxes aren't part of the plot layout so they have to follow the main one
+        for view_box in self._views:
+            view_box.setGeometry(self.plot.vb.sceneBoundingRect())
+            view_box.linkedViewChanged(self.plot.vb, view_box.XAxis)
+
+
 class IndicatorsWidget(QtGui.QWidget):
     NO_LABEL_INPUTS = ()
 
@@ -16,11 +16,12 @@ from pymeasure.display.manager import Experiment
 from mkidplotter.gui.results import Results
 from mkidplotter.gui.managers import Manager
 from mkidplotter.gui.browser import BrowserItem
-from mkidplotter.gui.curves import ParameterResultsCurve
+from mkidplotter.gui.curves import ParameterResultsCurve, OverviewResultsCurve
 from mkidplotter.gui.procedures import SweepGUIProcedure1
 from mkidplotter.icons.manage_icons import get_image_icon
 from mkidplotter.gui.widgets import (SweepPlotWidget, SweepInputsWidget, InputsWidget,
-                                     BrowserWidget, ResultsDialog, IndicatorsWidget, InstrumentControl)
+                                     BrowserWidget, ResultsDialog, IndicatorsWidget, InstrumentControl,
+                                     OverviewPlotWidget, HeatmapPlotWidget, ParameterTrendWidget)
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
@@ -143,8 +144,8 @@ class ManagedWindow(w.ManagedWindow):
         quantities = []
         for item in measured_quantities:
             if isinstance(item, (list, tuple)):
-                quantities.extend(item)
-            else:
+                quantities.extend(value for value in item if value is not None)
+            elif item is not None:  # e.g. histograms of a single column have no y axis
                 quantities.append(item)
         self.browser_widget = BrowserWidget(self.procedure_class, self.displays, quantities, parent=self)
         self.browser_widget.show_button.clicked.connect(self.show_experiments)
@@ -164,6 +165,7 @@ class ManagedWindow(w.ManagedWindow):
         self.manager.running.connect(self.running)
         self.manager.finished.connect(self.finished)
         self.manager.failed.connect(self.failed)
+        self.manager.removed.connect(self.experiment_removed)
         self.manager.log.connect(self.log.handle)
 
         self.indicators = IndicatorsWidget(self.procedure_class)
@@ -249,6 +251,7 @@ class ManagedWindow(w.ManagedWindow):
                 for index, plot in enumerate(self.plot):
                     for curve in experiment.curve[index]:
                         plot.removeItem(curve)
+                        curve.release()  # redrawn from the results when checked again
             # add plot on check
             else:
                 for index, plot in enumerate(self.plot):
@@ -269,6 +272,15 @@ class ManagedWindow(w.ManagedWindow):
 
         return experiment
 
+    def set_file_name(self, experiment, file_name):
+        """Names the experiment and its overview panels after the data file that it saves to."""
+        experiment.browser_item.setText(1, file_name)
+        experiment.data_filename = file_name
+        for curves in experiment.curve:
+            for curve in curves:
+                if isinstance(curve, OverviewResultsCurve):
+                    curve.file_name = file_name
+
     def change_color(self, experiment):
         color = QtGui.QColorDialog.getColor(
             initial=experiment.curve[0][0].opts['symbolBrush'].color(), parent=self)
@@ -286,7 +298,11 @@ class ManagedWindow(w.ManagedWindow):
         for index, p in enumerate(self.plot):
             for curve in experiment.curve[index]:
                 if curve.pen is not None:
-                    curve.pen.setColor(color)
+                    # replace the pen since it is shared by all of the curves with the same style
+                    pen = pg.mkPen(curve.pen)
+                    pen.setColor(color)
+                    curve.setPen(pen)
+                    curve.pen = curve.opts['pen']
                 if curve.symbolBrush is not None:
                     # symbolBrush.setColor() doesn't work as of pyqtgraph 0.12.1
                     curve.setSymbolBrush(pg.mkBrush(color=color))
@@ -404,8 +420,48 @@ class ManagedWindow(w.ManagedWindow):
         menu.addAction(action_use)
         menu_dict = {"menu": menu, "color": action_change_color,
                      "remove": action_remove, "use": action_use}
+
+        # Ensemble statistics
+        ensemble_widgets = [widget for widget in self.plot_widget if getattr(widget, "ENSEMBLE", False)]
+        if ensemble_widgets:
+            menu.addSeparator()
+            action_ensemble = QtGui.QAction(menu)
+            if ensemble_widgets[0].in_ensemble(experiment.results):
+                action_ensemble.setText("Remove from Ensemble")
+                action_ensemble.triggered.connect(lambda: self.remove_from_ensemble(experiment))
+            else:
+                action_ensemble.setText("Add to Ensemble")
+                action_ensemble.triggered.connect(lambda: self.add_to_ensemble(experiment))
+            menu.addAction(action_ensemble)
+            action_clear_ensemble = QtGui.QAction(menu)
+            action_clear_ensemble.setText("Clear Ensemble")
+            action_clear_ensemble.triggered.connect(self.clear_ensemble)
+            menu.addAction(action_clear_ensemble)
+            menu_dict.update({"ensemble": action_ensemble, "clear_ensemble": action_clear_ensemble})
         return menu_dict
 
+    def add_to_ensemble(self, experiment):
+        """Adds the experiment to the median and percentile bands of the plots that support them."""
+        for index, plot_widget in enumerate(self.plot_widget):
+            if getattr(plot_widget, "ENSEMBLE", False):
+                plot_widget.add_to_ensemble(experiment.curve[index])
+
+    def experiment_removed(self, experiment):
+        self.remove_from_ensemble(experiment)
+        for index, plot_widget in enumerate(self.plot_widget):
+            if isinstance(plot_widget, (OverviewPlotWidget, HeatmapPlotWidget, ParameterTrendWidget)):
+                plot_widget.remove_curves(experiment.curve[index])
+
+    def remove_from_ensemble(self, experiment):
+        for plot_widget in self.plot_widget:
+            if getattr(plot_widget, "ENSEMBLE", False):
+                plot_widget.remove_from_ensemble(experiment.results)
+
+    def clear_ensemble(self):
+        for plot_widget in self.plot_widget:
+            if getattr(plot_widget, "ENSEMBLE", False):
+                plot_widget.clear_ensemble()
+
     def clear_experiments(self):
         reply = QtGui.QMessageBox.question(self, 'Remove Graphs',
                                            "Are you sure you want to remove all of "
@@ -453,10 +509,9 @@ class ManagedWindow(w.ManagedWindow):
                     for index, _ in enumerate(self.plot):
                         for _, curve in enumerate(experiment.curve[index]):
                             curve.update()
-                    experiment.data_filename = os.path.basename(file_name)
-                    experiment.browser_item.setText(1, os.path.basename(file_name))
+                    self.set_file_name(experiment, os.path.basename(file_name))
                     experiment.browser_item.progressbar.setValue(100.)
-                    self.manager.load(experiment)
+                    self.manager.load(experiment, finished=True)
                     log.info('Opened data file %s' % file_name)
                     self.browser_widget.show_button.setEnabled(True)
                     self.browser_widget.hide_button.setEnabled(True)
@@ -489,6 +544,9 @@ class ManagedWindow(w.ManagedWindow):
                         self.resume()
                     self.abort()
                 self.resume()
+        # delete the files of the columns that were too big to keep in memory
+        for experiment in self.manager.experiments.queue:
+            experiment.results.close()
         # try to close the DAC
         self.close_window()
         self.closing = True
@@ -519,8 +577,7 @@ class ManagedWindow(w.ManagedWindow):
         experiment = self.new_experiment(results)
         start_time = datetime.now().strftime("%y%m%d_%H%M%S")
         file_name = procedure.file_name(self.window_type, time=start_time)
-        experiment.browser_item.setText(1, file_name)
-        experiment.data_filename = file_name
+        self.set_file_name(experiment, file_name)
         # queue the experiment
         self.manager.queue(experiment)
         # do some post queuing stuff
@@ -839,8 +896,7 @@ class SweepGUI(ManagedWindow):
                     # temp, field, atten, fr
                     numbers = [i for i in index] + [f_index]
                     file_name = procedure.file_name(self.window_type, numbers, start_time)
-                    experiment.browser_item.setText(1, file_name)
-                    experiment.data_filename = file_name
+                    self.set_file_name(experiment, file_name)
                     file_path = os.path.join(directory, file_name)
                     if file_path in files or file_path in previous_files:
                         message = "'{}' is already in the queue, skipping"
@@ -923,8 +979,7 @@ class FitGUI(ManagedWindow):
                 # make the experiment
                 experiment = self.new_experiment(results)
                 file_name = procedure.file_name(self.window_type)
-                experiment.browser_item.setText(1, file_name)
-                experiment.data_filename = file_name
+                self.set_file_name(experiment, file_name)
                 # save the config before queuing the experiment
                 # since the procedure needs the file
                 save_name = os.path.join(directory, file_name)
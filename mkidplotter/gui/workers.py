@@ -31,9 +31,6 @@ class Worker(w.Worker):
         except (NameError, AttributeError, TypeError):
             pass  # No dumps defined
         if topic == 'results':
-            for key, value in record.items():
-                if key not in self.results.data.keys() or clear:
-                    self.results.data[key] = []
-                self.results.data[key] += coerce_to_list(value)
+            self.results.append(record, clear=clear)
         else:
             self.monitor_queue.put((topic, record))
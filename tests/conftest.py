@@ -1,8 +1,13 @@
 import pytest
 import logging
 import tempfile
+import itertools
+from cycler import cycler
+
 import mkidplotter.examples.sweep_gui as gui
 import mkidplotter.examples.sweep_procedure as procedure
+from mkidplotter import Results, TracePlotWidget
+from mkidplotter.examples.pulse_procedure import Pulse
 
 
 @pytest.fixture
@@ -12,6 +17,30 @@ def sweep_procedure_class():
     return procedure.Sweep
 
 
+@pytest.fixture
+def pulse_results(tmp_path):
+    """
+    Returns a function that makes empty pulse results that are cached in a
+    temporary directory. The results are only made when it's called so that
+    the procedure can be patched first.
+    """
+    count = itertools.count()
+    def make():
+        return Results(Pulse(), str(tmp_path / "pulse{}.pickle".format(next(count))))
+    return make
+
+
+@pytest.fixture
+def trace_plot(qtbot):
+    """Returns a function that makes a trace plot of the phase and amplitude of the first channel."""
+    def make():
+        widget = TracePlotWidget(Pulse.DATA_COLUMNS, x_axes=["t", "t"], y_axes=["phase 1", "amplitude 1"],
+                                 color_cycle=cycler(color=[(31, 119, 180), (255, 127, 14)]))
+        qtbot.addWidget(widget)
+        return widget
+    return make
+
+
 @pytest.fixture()
 def sweep_gui(sweep_procedure_class, caplog, qtbot):
     # create window
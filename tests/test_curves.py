@@ -0,0 +1,275 @@
+import os
+import numpy as np
+import pytest
+import pyqtgraph as pg
+
+from pymeasure.display.Qt import QtCore, QtGui
+from pymeasure.experiment import Procedure
+from pymeasure.display.browser import Browser
+from pymeasure.display.manager import Experiment
+from mkidplotter import Results, TracePlotWidget
+from mkidplotter.gui.browser import BrowserItem
+from mkidplotter.gui.managers import Manager
+from mkidplotter.examples.pulse_procedure import Pulse
+from mkidplotter.gui.curves import (PointCloudItem, WaterfallItem, BatchedCurveItem, OverviewItem, MKIDResultsCurve,
+                                    HistogramResultsCurve, PersistenceResultsCurve, SpectrogramResultsCurve, bin_edges)
+
+
+def test_bin_edges_linear():
+    centers = np.linspace(1e3, 1e5, 100)
+    dx = centers[1] - centers[0]
+    edges = bin_edges(centers)
+    assert np.allclose(edges, np.append(centers, centers[-1] + dx) - dx / 2), "linear bin edges are wrong"
+
+
+def test_bin_edges_log():
+    centers = np.logspace(0, 5, 100)
+    edges = np.log10(bin_edges(centers))
+    assert len(edges) == len(centers) + 1, "there should be one more edge than center"
+    assert np.allclose((edges[:-1] + edges[1:]) / 2, np.log10(centers)), "log bin edges are not centered"
+
+
+
+def test_bin_edges_dc_bin():
+    centers = np.append(0, np.logspace(0, 5, 100))
+    edges = bin_edges(centers)
+    assert edges[0] == 0 and np.all(edges[1:] > 0), "the DC bin of a spectrum should start at zero"
+    log_edges = np.log10(edges[1:])
+    assert np.allclose((log_edges[:-1] + log_edges[1:]) / 2, np.log10(centers[1:])), \
+        "the DC bin stopped the positive bins from being spaced in log space"
+
+def test_point_cloud(qapp):
+    item = PointCloudItem()
+    item.setData([2, 2, 7], [3, 3, 7], color=(255, 0, 0, 128), size=3)
+    image = item.rasterize(QtGui.QTransform(), QtCore.QRect(0, 0, 10, 10))
+    alpha = np.array([[QtGui.qAlpha(image.pixel(x, y)) for x in range(10)] for y in range(10)])
+    assert alpha[3, 2] > alpha[7, 7] > 0, "overlapping points should be more opaque"
+    assert alpha[3, 3] > 0 and alpha[0, 0] == 0, "the points were not drawn with the right size"
+    assert QtGui.qRed(image.pixel(7, 7)) == 255, "the points were drawn with the wrong color"
+
+
+def test_waterfall(qapp):
+    waterfall = WaterfallItem(rows=3, bins=4, log=False)
+    row = waterfall.resample(np.arange(9), np.arange(9))
+    assert np.allclose(row, [0.5, 2.5, 4.5, 7]), "the spectrum was not averaged into the bins"
+    assert np.allclose(waterfall.resample([0, 8], [0, 8]), [0, 3, 5, 8]), "empty bins were not interpolated"
+    for offset in range(4):
+        waterfall.add_row(row + offset)
+    assert waterfall.count == 4 and waterfall.levels[1] >= 10, "the levels didn't grow with the data"
+    assert np.array_equal(waterfall._data[0], row + 3), "the oldest row was not replaced"
+    assert np.all(waterfall._pixels[0] > waterfall._pixels[1]), "the rows were not colored with the same levels"
+    rect = waterfall.boundingRect()
+    assert (rect.top(), rect.height()) == (1, 3), "only the newest rows should be drawn"
+
+
+def test_overview(qapp):
+    overview = OverviewItem()
+    for key in range(5):
+        overview.set_panel(key, np.arange(1000), np.sin(np.arange(1000) + key), pg.mkPen('k'))
+    rect = overview.boundingRect()
+    assert (rect.width(), rect.height()) == pytest.approx((3.2, 2.1)), "the panels are not in a square grid"
+    assert overview.panel_at(1.5, -0.5) == 1 and overview.panel_at(0.5, -1.5) == 3, "the wrong panel was found"
+    assert overview.panel_at(1.05, -0.5) is None, "the gap between the panels belongs to a panel"
+    assert overview.panels[0][0].elementCount() <= OverviewItem.POINTS, "the panel was not decimated"
+    overview.remove(1)
+    assert overview.panel_at(1.5, -0.5) == 2, "the panels didn't move up after a removal"
+
+
+def test_persistence_counts_every_trace(qapp, pulse_results):
+    results = pulse_results()
+    curve = PersistenceResultsCurve(results, x="t", y="phase 1")
+    for _ in range(5):  # replaced without the plot being refreshed
+        results.append({"t": np.arange(100), "phase 1": np.random.randn(100)}, clear=True)
+    assert not curve._histogram.n_samples, "the traces were binned by the thread that appended them"
+    curve.release()
+    counts, _ = curve.prepare()['persistence']
+    assert counts.sum() == 500, "traces that were replaced before the refresh were not counted"
+
+
+def test_spectrogram_adds_every_spectrum(qapp, monkeypatch, pulse_results):
+    results = pulse_results()
+    waterfall = WaterfallItem(rows=10, bins=8)
+    curve = SpectrogramResultsCurve(results, x="t", y="phase 1", waterfall=waterfall)
+    resampled = []
+    resample = waterfall.resample
+    monkeypatch.setattr(waterfall, "resample", lambda x, y: resampled.append(x) or resample(x, y))
+    for index in range(15):
+        results.append({"t": np.arange(1, 101), "phase 1": np.full(100, index + 1.)}, clear=True)
+        if index == 7:
+            assert not resampled, "the spectra were resampled by the thread that appended them"
+            curve.draw(curve.prepare())
+    curve.draw(curve.prepare())
+    assert waterfall.count == 15, "spectra that were replaced before the refresh were not added"
+    curve.reset()
+    assert curve.prepare() is None and curve._version is None, "the spectrum was added twice after a reset"
+
+
+def test_nearest_log_mode(qapp, pulse_results):
+    results = pulse_results()
+    results.append({"t": np.logspace(0, 6, 1000), "phase 1": np.linspace(0, 1, 1000)})
+    curve = MKIDResultsCurve(results, x="t", y="phase 1")
+    curve.setLogMode(True, False)
+    curve.draw(curve.prepare())
+    x, y = curve.nearest(3.001, 0.5, 0.001, 0.001, 5)
+    assert np.isclose(x, np.log10(np.logspace(0, 6, 1000)[500])), "the wrong point was found in log mode"
+    assert curve.nearest(3.001, 0.9, 0.001, 0.001, 5) is None, "a point outside of the radius was found"
+
+
+def test_nearest_step_mode(qapp, pulse_results):
+    results = pulse_results()
+    results.append({"t": np.arange(11), "phase 1": np.arange(10) ** 2})
+    curve = HistogramResultsCurve(results, x="t", y="phase 1")
+    curve.draw(curve.prepare())
+    assert curve.nearest(3.4, 9.2, 0.1, 0.1, 5) == (3.5, 9), "the step wasn't found at its center"
+
+
+def test_merged_updates(qtbot, monkeypatch, pulse_results):
+    results = pulse_results()
+    curve = MKIDResultsCurve(results, x="t", y="phase 1")
+    drawn = []
+    draw = curve.draw
+    monkeypatch.setattr(curve, "draw", lambda prepared: drawn.append(prepared) or draw(prepared))
+    for index in range(3):  # the first preparation can't be drawn before the event loop runs
+        results.append({"t": np.arange(index * 10, index * 10 + 10), "phase 1": np.ones(10)})
+        curve.update()
+    qtbot.waitUntil(lambda: not curve._busy, timeout=5000)
+    assert len(drawn) == 2, "the overlapping updates were not merged into one"
+    assert np.array_equal(curve.xData, np.arange(30)), "the last draw doesn't have the latest data"
+
+
+def test_hidden_plot_catches_up(qtbot, trace_plot, pulse_results):
+    widget = trace_plot()
+    results = pulse_results()
+    results.procedure.status = Procedure.RUNNING
+    results.append({"t": np.arange(10), "phase 1": np.ones(10), "amplitude 1": np.ones(10)})
+    curve = widget.new_curve(results)[0]
+    widget.plot.addItem(curve)
+    widget.plot_frame.update_curves()
+    assert curve.xData is None and not curve._busy, "the hidden plot was updated"
+    widget.show()
+    qtbot.waitUntil(lambda: curve.xData is not None, timeout=5000)
+    assert np.array_equal(curve.xData, np.arange(10)), "the plot didn't catch up when it was shown"
+
+
+def test_pens_pooled_by_style(qtbot, trace_plot, pulse_results):
+    widget = trace_plot()
+    results = pulse_results()
+    curves = [widget.new_curve(results) for _ in range(3)]  # the cycle has four styles
+    assert curves[2][0].pen is curves[0][0].pen, "curves with the same style don't share their pen"
+    assert curves[1][0].pen is not curves[0][0].pen, "curves with different styles share their pen"
+    assert curves[0][1].pen is not curves[0][0].pen, "the curves of an experiment share their pen"
+
+
+def test_release_frees_data(qtbot, trace_plot, pulse_results):
+    widget = trace_plot()
+    results = pulse_results()
+    results.append({"t": np.arange(10), "phase 1": np.ones(10), "amplitude 1": np.ones(10)})
+    curve = widget.new_curve(results)[0]
+    widget.plot.addItem(curve)
+    curve.draw(curve.prepare())
+    widget.plot.removeItem(curve)  # like unchecking the experiment in the browser
+    curve.release()
+    assert curve.xData is None and curve._index is None, "the data of the unchecked curve was kept"
+    curve.update()
+    widget.plot.addItem(curve)
+    qtbot.waitUntil(lambda: curve.xData is not None, timeout=5000)
+    assert np.array_equal(curve.xData, np.arange(10)), "the checked curve wasn't drawn again"
+
+
+
+def test_remove_releases_curves(qtbot, monkeypatch, trace_plot, pulse_results):
+    monkeypatch.setattr(Results, "SPILL_SIZE", 10)
+    widget = trace_plot()
+    manager = Manager([widget.plot], Browser(Pulse, [], []), port=None)
+    results = pulse_results()
+    results.append({"t": np.arange(20), "phase 1": np.ones(20), "amplitude 1": np.ones(20)})
+    curves = widget.new_curve(results)
+    experiment = Experiment(results, [curves], BrowserItem(results, curves[0]))
+    manager.load(experiment, finished=True)
+    for curve in curves:
+        curve.draw(curve.prepare())
+    files = [results.data[key].file_name for key in ("t", "phase 1", "amplitude 1")]
+    manager.remove(experiment)
+    assert all(curve.xData is None and curve._index is None for curve in curves), \
+        "the removed curves kept the memory maps of the spilled columns"
+    assert not any(os.path.isfile(file_name) for file_name in files), "the spilled columns weren't deleted"
+
+def test_batched_curves(qapp):
+    def render():
+        image = QtGui.QImage(50, 40, QtGui.QImage.Format_ARGB32)
+        image.fill(QtCore.Qt.white)
+        painter = QtGui.QPainter(image)
+        batch.paint(painter)
+        painter.end()
+        return [QtGui.QColor(image.pixel(25, y)) for y in (10, 20, 30)]
+    batch = BatchedCurveItem()
+    pen, other = pg.mkPen("r", width=3), pg.mkPen("b", width=3)
+    batch.set_segment("first", [5, 45], [10, 10], pen)
+    batch.set_segment("second", [5, 45], [20, 20], pen)
+    batch.set_segment("third", [5, 45], [30, 30], other)
+    colors = render()
+    assert [len(paths) for paths in batch._paths.values()] == [1, 1], "the lines with the same pen were not one path"
+    assert [color.red() > 200 for color in colors] == [True, True, False], "the lines were drawn with the wrong pens"
+    assert colors[2].blue() > 200, "the line with the other pen was not drawn"
+    batch.remove("second")
+    colors = render()
+    assert colors[0].red() > 200 and colors[1] == QtGui.QColor(QtCore.Qt.white), "the removed line is still drawn"
+
+
+def test_scrolling_trace(qtbot, trace_plot, monkeypatch, pulse_results):
+    monkeypatch.setattr(Pulse, "RING_COLUMNS", {"t": 100, "phase 1": 100, "amplitude 1": 100})
+    monkeypatch.setattr(TracePlotWidget, "SCROLLING", True)
+    widget = trace_plot()
+    results = pulse_results()
+    curve = widget.new_curve(results)[0]
+    widget.plot.addItem(curve)
+    assert curve.opts['pen'].style() != QtCore.Qt.NoPen, "the scrolling trace isn't drawn as a line"
+    for start in range(0, 180, 60):
+        samples = np.arange(start, start + 60)
+        results.append({"t": samples, "phase 1": samples, "amplitude 1": samples})
+        curve.draw(curve.prepare())
+    assert np.array_equal(curve.xData, np.arange(80, 180)), "the plot didn't scroll to the newest samples"
+    assert np.array_equal(curve.yData, curve.xData), "the x and y windows don't match"
+    assert list(curve.dataBounds(0)) == [80, 179], "the bounds include samples that were dropped"
+
+
+def test_scrolling_level_of_detail(qapp, monkeypatch, pulse_results):
+    monkeypatch.setattr(Pulse, "RING_COLUMNS", {"t": 10000, "phase 1": 10000})
+    results = pulse_results()
+    results.append({"t": np.arange(10000), "phase 1": np.sin(np.arange(10000))})
+    curve = MKIDResultsCurve(results, x="t", y="phase 1", decimate=True)
+    curve.draw(curve.prepare())
+    assert curve._lod is not None, "the trace wasn't decimated"
+    x_range, query = curve._lod.x_range, curve._lod.query(0, 10000, 100)
+    x_data, y_data = curve.xData.copy(), curve.yData.copy()
+    samples = np.arange(10000, 13000)  # more than the ring keeps in reserve
+    results.append({"t": samples, "phase 1": np.sin(samples)})
+    assert curve._lod.x_range == x_range, "appending to the ring changed the drawn level of detail"
+    assert all(np.array_equal(a, b) for a, b in zip(curve._lod.query(0, 10000, 100), query)), \
+        "appending to the ring changed the drawn level of detail"
+    assert np.array_equal(curve.xData, x_data) and np.array_equal(curve.yData, y_data), \
+        "appending to the ring changed the drawn data"
+
+
+def test_batch_only_finished(qtbot, monkeypatch, trace_plot, pulse_results, tmp_path):
+    monkeypatch.setattr(TracePlotWidget, "SCROLLING", True)  # lines so that the finished curves can be batched
+    monkeypatch.setattr(Pulse, "wait_time", 0.02)
+    widget = trace_plot()
+    widget.show()
+    browser = Browser(Pulse, [], [])
+    manager = Manager([widget.plot], browser, port=None)
+    results = pulse_results()
+    results.procedure.directory, results.procedure.n_pulses, results.procedure.n_trace = str(tmp_path), 30, 100
+    curves = widget.new_curve(results)
+    states = []  # (status, batched) every time that a curve is drawn
+    for curve in curves:
+        update_batch = curve.update_batch
+        monkeypatch.setattr(curve, "update_batch", lambda x, y, curve=curve, update_batch=update_batch: (
+            update_batch(x, y), states.append((curve.results.procedure.status, curve._batched))))
+    experiment = Experiment(results, [curves], BrowserItem(results, curves[0]))
+    with qtbot.waitSignal(manager.finished, timeout=10000):
+        manager.queue(experiment)
+    qtbot.waitUntil(lambda: all(curve._batched for curve in curves), timeout=5000)
+    live = [batched for status, batched in states if status in (Procedure.QUEUED, Procedure.RUNNING)]
+    assert live and not any(live), "a live curve was drawn by the batch"
+    assert set(widget.plot_frame.batch.segments) == set(curves), "the finished curves aren't in the batch"
@@ -0,0 +1,55 @@
+import warnings
+import numpy as np
+import pytest
+
+from mkidplotter.gui.decimation import LevelOfDetail
+
+
+@pytest.mark.parametrize("step", [False, True])
+def test_level_of_detail_envelope(step):
+    n = 100000
+    y = np.random.randn(n)
+    x = np.arange(n + step, dtype=float)
+    lod = LevelOfDetail(x, y, step=step)
+    x_lod, y_lod = lod.query(0, n, 500)
+    assert len(y_lod) <= 4 * 500, "the decimated trace has too many points"
+    assert len(x_lod) == len(y_lod) + step, "the decimated x and y data don't match"
+    assert np.all(np.diff(x_lod) >= 0), "the decimated x data is not sorted"
+    assert y_lod.max() == y.max() and y_lod.min() == y.min(), "the decimated trace lost the extrema"
+
+
+def test_level_of_detail_zoom():
+    n = 100000
+    x, y = np.arange(n, dtype=float), np.random.randn(n)
+    lod = LevelOfDetail(x, y)
+    x_lod, y_lod = lod.query(1000, 1100, 500)
+    assert np.array_equal(y_lod, y[999:1102]), "zooming in did not return the full resolution data"
+    assert np.array_equal(x_lod, x[999:1102]), "zooming in did not return the full resolution data"
+
+
+def test_level_of_detail_extend(monkeypatch):
+    monkeypatch.setattr(LevelOfDetail, "MAX_SIZE", 1024)
+    monkeypatch.setattr(LevelOfDetail, "CHUNK", 5000)
+    n = 300000
+    x, y = np.arange(n, dtype=float), np.random.randn(n)
+    lod = LevelOfDetail()
+    for stop in np.append(np.arange(1000, n, 7777), n):
+        assert lod.extend(x[:stop], y[:stop]), "the trace is increasing"
+    fresh = LevelOfDetail(x, y)
+    assert lod.first_factor > LevelOfDetail.FACTOR, "the first level was not coarsened"
+    assert len(lod.levels) == len(fresh.levels), "the extended pyramid has the wrong number of levels"
+    for level, fresh_level in zip(lod.levels, fresh.levels):
+        assert all(np.array_equal(a, b) for a, b in zip(level, fresh_level)), "the extended pyramid is wrong"
+    assert not lod.extend(np.append(x, 0), np.append(y, 0)), "a decreasing trace was decimated"
+
+
+def test_level_of_detail_log_dc_bin():
+    n = 100000
+    x, y = np.append(-1, np.logspace(0, 5, n)), np.random.randn(n)  # the first bin is a DC bin around zero
+    lod = LevelOfDetail(x, y, step=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        x_lod, y_lod = lod.query(*lod.x_range, 500, log=True)
+    assert np.all(x_lod > 0), "x values at or below zero were returned in log mode"
+    assert len(y_lod) <= 4 * 500, "the DC bin stopped the trace from being decimated"
+    assert y_lod.max() == y.max() and y_lod.min() == y.min(), "the decimated trace lost the extrema"
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+
+from mkidplotter import Results
+from mkidplotter.examples.pulse_procedure import Pulse
+
+
+def test_column_cache(pulse_results):
+    results = pulse_results()
+    results.append({"peaks 1": [1, 2, 3]})
+    column = results.column("peaks 1")
+    assert results.column("peaks 1") is column, "the column was converted twice"
+    results.append({"peaks 1": [4, 5]})
+    assert np.array_equal(results.column("peaks 1"), [1, 2, 3, 4, 5]), "the appended values are wrong"
+    assert np.array_equal(column, [1, 2, 3]), "appending changed an old array"
+    results.append({"peaks 1": [6]}, clear=True)
+    assert np.array_equal(results.column("peaks 1"), [6]), "the cleared column is wrong"
+
+
+def test_spilled_column(monkeypatch, pulse_results):
+    monkeypatch.setattr(Results, "SPILL_SIZE", 10)
+    results = pulse_results()
+    results.append({"peaks 1": np.arange(8)})
+    results.append({"peaks 1": np.arange(8, 16)})
+    assert not isinstance(results.data["peaks 1"], list), "the column was not moved to disk"
+    results.append({"peaks 1": [16]})
+    column = results.column("peaks 1")
+    assert isinstance(column, np.memmap), "the column is not memory mapped"
+    assert np.array_equal(column, np.arange(17)), "the spilled values are wrong"
+
+
+def test_ring_column(monkeypatch, pulse_results):
+    monkeypatch.setattr(Pulse, "RING_COLUMNS", {"peaks 1": 10})
+    results = pulse_results()
+    results.append({"peaks 1": np.arange(8)})
+    reset = results.version("peaks 1", reset=True)
+    results.append({"peaks 1": np.arange(8, 10)})
+    assert results.version("peaks 1", reset=True) == reset, "filling the ring is an append"
+    results.append({"peaks 1": np.arange(10, 15)})
+    assert results.version("peaks 1", reset=True) != reset, "dropping values was not a reset"
+    assert np.array_equal(results.column("peaks 1"), np.arange(5, 15)), "the newest values were not kept"
+
+
+def test_spilled_on_load(monkeypatch, pulse_results):
+    monkeypatch.setattr(Results, "SPILL_SIZE", 10)
+    results = pulse_results()
+    results.data = {"peaks 1": np.arange(17)}
+    column = results.data["peaks 1"]
+    assert not isinstance(column, list), "the loaded column was not moved to disk"
+    assert np.array_equal(results.column("peaks 1"), np.arange(17)), "the spilled values are wrong"
+    results.close()
+    assert not os.path.isfile(column.file_name), "the column file was not deleted"
+
+
+def test_close_keeps_locked_files(monkeypatch, pulse_results):
+    monkeypatch.setattr(Results, "SPILL_SIZE", 10)
+    results = pulse_results()
+    results.data = {"peaks 1": np.arange(17)}
+    def remove(file_name):
+        raise PermissionError(file_name)  # like deleting a memory mapped file on Windows
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "remove", remove)
+        results.close()
+    file_name = results.data["peaks 1"].file_name
+    assert os.path.isfile(file_name), "the locked file should be kept"
+    results.close()
+    assert not os.path.isfile(file_name), "the file wasn't deleted once it was unlocked"
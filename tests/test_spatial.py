@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from mkidplotter.gui.spatial import SpatialIndex
+
+
+@pytest.mark.parametrize("increasing", [False, True])
+def test_spatial_index(increasing):
+    n = 20000
+    x = np.sort(np.random.randn(n)) if increasing else np.random.randn(n)
+    y = np.random.randn(n)
+    index = SpatialIndex()
+    for stop in range(1000, n + 1, 1000):
+        index.add(x[:stop], y[:stop])
+    assert index.sorted == increasing, "the index type is wrong"
+    for x0, y0 in np.random.randn(20, 2):
+        distance = ((x - x0) / 0.01)**2 + ((y - y0) / 0.01)**2
+        nearest = index.nearest(x0, y0, 0.01, 0.01, 10)
+        if distance.min() > 100:
+            assert nearest is None, "a point outside of the radius was found"
+        else:
+            assert distance[nearest] == distance.min(), "the wrong point was found"
@@ -0,0 +1,67 @@
+import numpy as np
+
+from mkidplotter.gui.statistics import StreamingHistogram, StreamingHistogram2D, EnsembleBand, RunningBounds
+
+
+def test_streaming_histogram():
+    samples = np.concatenate(([0, 1], np.random.randn(1000), [50, -50]))
+    histogram = StreamingHistogram()
+    histogram.add(samples[:2])  # start with bin edges that are exact in floating point
+    for chunk in np.array_split(samples[2:], 37):
+        histogram.add(chunk)
+    edges, counts = histogram.histogram()
+    assert counts.sum() == len(samples), "samples were lost while re-binning"
+    assert len(edges) == len(counts) + 1, "there should be one more edge than bin"
+    assert edges[0] <= samples.min() and edges[-1] >= samples.max(), "the bins don't cover the samples"
+    # only the first maximum can be counted differently since it was in the last bin when it was added
+    assert np.abs(counts - np.histogram(samples, edges)[0]).sum() <= 2, "the counts are wrong"
+    edges, density = histogram.histogram(density=True)
+    assert np.isclose(np.sum(density * np.diff(edges)), 1), "the density is not normalized"
+
+
+def test_streaming_histogram_2d():
+    x, y = np.random.randn(2, 10000)
+    histogram = StreamingHistogram2D()
+    for x_chunk, y_chunk in zip(np.array_split(x, 23), np.array_split(y, 23)):
+        histogram.add(x_chunk, y_chunk)
+    histogram.add([np.nan], [0])
+    counts, (x0, y0, width, height) = histogram.image()
+    assert histogram.n_samples == len(x) + 1, "points were skipped"
+    assert counts.sum() == len(x), "points were lost while re-binning"
+    # growing the bins at the low end can round the high edge below the largest point
+    assert x0 <= x.min() and x.max() - (x0 + width) <= 1e-12 * width, "the bins don't cover the x data"
+    assert y0 <= y.min() and y.max() - (y0 + height) <= 1e-12 * height, "the bins don't cover the y data"
+    x_edges = np.linspace(x0, x0 + width, histogram.bins + 1)
+    y_edges = np.linspace(y0, y0 + height, histogram.bins + 1)
+    expected = np.histogram2d(x, y, [x_edges, y_edges])[0]
+    assert np.abs(counts - expected).sum() <= 0.01 * len(x), "the counts are wrong"
+
+
+def test_ensemble_band():
+    x = np.linspace(1, 10, 50)
+    rows = np.random.randn(20, len(x))
+    band = EnsembleBand()
+    for key, row in enumerate(rows):
+        band.add(key, x, row)
+    band.add("shifted", x + 5, rows[0])
+    _, _, median, _ = band.bands()
+    assert np.allclose(median, np.nanmedian(np.vstack((rows, np.interp(x, x + 5, rows[0], left=np.nan))), axis=0)), \
+        "partially defined curves are not ignored outside of their range"
+    band.remove("shifted")
+    assert len(band) == len(rows) and "shifted" not in band, "the curve was not removed"
+    x_band, low, median, high = band.bands()
+    assert np.array_equal(x_band, x), "the band grid is wrong"
+    for values, percentile in zip((low, median, high), EnsembleBand.PERCENTILES):
+        assert np.allclose(values, np.percentile(rows, percentile, axis=0)), "the percentiles are wrong"
+
+
+def test_running_bounds():
+    np.random.seed(0)  # the percentiles are estimated from a random sample
+    data = np.concatenate((np.random.randn(100000), [np.nan, np.inf, 100]))
+    bounds = RunningBounds()
+    for chunk in np.array_split(data, 10):
+        bounds.add(chunk)
+    assert bounds.size == len(data), "values were skipped"
+    assert bounds.bounds() == (np.nanmin(data[:-2]), 100), "the range is wrong"
+    low, high = bounds.bounds(0.9)
+    assert np.isclose(low, -1.645, atol=0.2) and np.isclose(high, 1.645, atol=0.2), "the percentiles are wrong"
@@ -1,9 +1,12 @@
 import os
 import pytest
+import tempfile
 import numpy as np
 from pathlib import Path
 from pymeasure.display.Qt import QtCore, QtGui
 
+from mkidplotter import Results
+
 SWEEP_PARAMETERS = ["start_atten", "stop_atten", "n_atten",
                     "start_field", "stop_field", "n_field",
                     "start_temp", "stop_temp", "n_temp",
@@ -17,6 +20,55 @@ def test_init(sweep_gui, qtbot):
     qtbot.waitForWindowShown(sweep_gui)
 
 
+@pytest.mark.qt_log_level_fail("WARNING")
+def test_color_copy_on_write(sweep_gui):
+    def new_experiment():
+        return sweep_gui.new_experiment(Results(sweep_gui.make_procedure(), tempfile.mktemp(suffix=".pickle")))
+    # find an experiment whose first curve shares its pen with the first experiment
+    first = new_experiment()
+    for _ in range(100):
+        other = new_experiment()
+        if other.curve[0][0].pen is first.curve[0][0].pen:
+            break
+    else:
+        pytest.fail("the curves with the same style don't share their pen")
+    def pen_colors(experiment):  # the shared pen and the copy that the curve draws with
+        return [(curve.pen.color().name(), curve.opts['pen'].color().name())
+                for curves in experiment.curve for curve in curves if curve.pen is not None]
+    colors = pen_colors(other)
+    color = QtGui.QColor(255, 0, 0)
+    sweep_gui.update_color(first, color)
+    assert first.curve[0][0].opts['pen'].color() == color, "the color of the experiment didn't change"
+    assert pen_colors(other) == colors, "changing the color of an experiment changed another one"
+
+
+def run_one(sweep_gui, qtbot, *slots):
+    """Queues a single sweep and calls the slots with the experiment as it's queued, run and finished."""
+    for name, value in [("n_atten", 1), ("n_field", 1), ("n_temp", 1), ("frequencies1", 5.0), ("frequencies2", 6.0)]:
+        getattr(sweep_gui.base_inputs_widget, name).setValue(value)
+    sweep_gui.inputs.n_points.setValue(10)
+    for signal in (sweep_gui.manager.queued, sweep_gui.manager.running, sweep_gui.manager.finished):
+        for slot in slots:
+            signal.connect(slot)
+    with qtbot.waitSignal(sweep_gui.manager.finished, timeout=10000, raising=True):
+        qtbot.mouseClick(sweep_gui.queue_button, QtCore.Qt.LeftButton)
+
+
+@pytest.mark.qt_log_level_fail("WARNING")
+def test_live_curves_not_finished(sweep_gui, qtbot):
+    states = []
+    def record(experiment):
+        curves = [curve for curves in experiment.curve for curve in curves if hasattr(curve, "cache_finished")]
+        states.append((experiment.procedure.status, [curve._finished for curve in curves],
+                       [curve.curve.cacheMode() for curve in curves]))
+    run_one(sweep_gui, qtbot, record)
+    assert len(states) == 3, "the experiment wasn't queued, run and finished"
+    for status, finished, cache in states[:-1]:
+        assert not any(finished), "a {} curve was marked as finished".format(status)
+        assert not any(cache), "a {} curve was cached".format(status)
+    assert all(states[-1][1]), "the curves weren't marked as finished"
+
+
 @pytest.mark.parametrize("start_atten, stop_atten, n_atten, "
                          "start_field, stop_field, n_field, "
                          "start_temp, stop_temp, n_temp, "
@@ -0,0 +1,31 @@
+import numpy as np
+
+from mkidplotter.gui.tables import ParameterGrid, FitTable
+
+
+def test_parameter_grid():
+    grid = ParameterGrid()
+    for key, (x, y, value) in enumerate([(1, 0, 1), (2, 0, 2), (1, 5, 3), (1, 5, 5), (2, 5, np.nan)]):
+        grid.set(key, x, y, value)
+    grid.set(1, 2, 0, 4)
+    x, y, values = grid.image()
+    assert np.array_equal(x, [1, 2]) and np.array_equal(y, [0, 5]), "the grid values are wrong"
+    assert np.array_equal(values, [[1, 4], [4, np.nan]], equal_nan=True), "the cells were not averaged"
+    grid.remove(0)
+    grid.remove(4)
+    x, y, values = grid.image()
+    assert len(grid) == 3 and 4 not in grid, "the results were not removed"
+    assert np.array_equal(values, [[np.nan, 4], [4, np.nan]], equal_nan=True), "the wrong result was removed"
+
+
+def test_fit_table():
+    table = FitTable()
+    for key in range(20):
+        table.set(key, {"qi": key * 10, "temperature": key}, {"qi": 1})
+    table.set(20, {"temperature": 20, "fr": 4})
+    assert np.array_equal(table.column("qi")[-2:], [190, np.nan], equal_nan=True), "a missing value is not NaN"
+    assert np.array_equal(table.column("fr")[-2:], [np.nan, 4], equal_nan=True), "a new column is not NaN filled"
+    table.remove(3)
+    assert len(table) == 20 and 3 not in table, "the row was not removed"
+    assert table.column("temperature")[3] == 20 and np.isnan(table.errors("qi")[3]), "the last row didn't move"
+    assert np.array_equal(np.sort(table.column("temperature")), np.delete(np.arange(21), 3)), "rows were lost"
@@ -0,0 +1,46 @@
+import numpy as np
+
+from mkidplotter.gui.timeseries import RingBuffer, TimeSeries, TimeSeriesStore
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(10, columns=2)
+    buffer.extend(np.arange(25), -np.arange(25))
+    view = buffer.view()
+    assert np.array_equal(view[0], np.arange(15, 25)), "the newest rows were not kept in order"
+    assert np.array_equal(view[1], -np.arange(15, 25)), "the columns don't match"
+    buffer.append(0, 0)
+    assert np.array_equal(view[0], np.arange(15, 25)), "appending overwrote a view"
+    buffer.pop()
+    buffer.append(25, -25)
+    assert np.array_equal(buffer.view()[0], np.arange(16, 26)), "the newest row was not replaced"
+
+
+def test_time_series():
+    n = 100000
+    x, y = np.arange(n, dtype=float), np.random.randn(n)
+    series = TimeSeries(capacity=1000, levels=5)
+    for chunk in np.array_split(np.arange(n), 333):
+        series.extend(x[chunk], y[chunk])
+    assert series.x_range == (0, n - 1), "the coarsest level doesn't cover the whole history"
+    x_series, y_series = series.query(0, n, 200)
+    assert len(x_series) <= 4 * 200, "the decimated series has too many points"
+    assert y_series.max() == y.max() and y_series.min() == y.min(), "the decimated series lost the extrema"
+    x_series, y_series = series.query(n - 100, n, 200)
+    assert np.array_equal(y_series, y[n - 101:]), "zooming in did not return the full resolution data"
+
+
+def test_time_series_store(tmpdir):
+    store = TimeSeriesStore(str(tmpdir), channels=2)
+    t = 1.7e9 + 60 * np.arange(3 * 24 * 60)
+    store.extend(t[1:], t[1:] + 1, t[1:] + 2)
+    store.append(t[0], t[0] + 1, t[0] + 2)  # written out of order
+    assert len(store.days()) == 4, "the rows were not split by day"
+    x, values = store.query()
+    assert np.array_equal(x, t), "the timestamps were not sorted"
+    assert np.array_equal(values, [t + 1, t + 2]), "the channels don't match the timestamps"
+    x, values = store.query(start=t[-1] - 3600)
+    assert np.array_equal(x, t[-61:]), "the wrong time range was returned"
+    series = TimeSeries()
+    series.backfill(store, channel=1)
+    assert np.array_equal(series.data()[1], t + 2), "the series was not filled from the store"
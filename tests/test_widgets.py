@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from collections import deque
+
+from pymeasure.experiment import Procedure
+from mkidplotter import (TimePlotIndicator, MultiTimePlotIndicator, TimeSeries, TimeSeriesStore, HeatmapPlotWidget,
+                         ParameterTrendWidget)
+from mkidplotter.examples.pulse_procedure import Pulse
+
+
+def make_store(directory, channels):
+    store = TimeSeriesStore(str(directory), channels=channels)
+    t = time.time() - 3600 + np.arange(100.)
+    store.extend(t, *[t + channel for channel in range(1, channels + 1)])
+    return store, t
+
+
+def test_time_plot_indicator_backfill(qtbot, tmp_path):
+    store, t = make_store(tmp_path, 2)
+    store.append(time.time() - 7200, 0, 0)  # older than the history
+    indicator = TimePlotIndicator(deque(), deque(), refresh_time=3600, store=store, channel=1, history=3600 + 60)
+    qtbot.addWidget(indicator)
+    assert np.array_equal(indicator.data_x, t), "the old samples weren't backfilled from the store"
+    assert np.array_equal(indicator.data_y, t + 2), "the wrong channel was backfilled"
+    series = TimeSeries()
+    indicator = TimePlotIndicator(series, refresh_time=3600, store=store, history=3600 + 60)
+    qtbot.addWidget(indicator)
+    assert np.array_equal(series.data()[1], t + 1), "the time series wasn't backfilled from the store"
+
+
+def test_multi_time_plot_indicator(qtbot, tmp_path, monkeypatch):
+    store, t = make_store(tmp_path, 3)
+    series = {name: TimeSeries() for name in ("stage", "pressure", "current")}
+    indicator = MultiTimePlotIndicator(series, refresh_time=3600, axes={"stage": "K", "current": "A"}, store=store)
+    qtbot.addWidget(indicator)
+    for channel, data in enumerate(series.values()):
+        assert np.array_equal(data.data()[1], t + channel + 1), "the channels weren't backfilled in order"
+    # the first channel labels the shared axis and the others with an axis get their own view box
+    assert indicator.plot.getAxis('left').labelText == "K", "the first channel didn't label the shared axis"
+    curves = [curve for _, _, curve in indicator._channels]
+    assert len(indicator._views) == 1, "only the current should have its own axis"
+    assert curves[2] in indicator._views[0].addedItems, "the current isn't drawn against its own axis"
+    assert curves[1] in indicator.plot.items, "the pressure isn't drawn against the shared axis"
+    # one update of the shared timer redraws the channels with new samples only
+    drawn = []
+    draw = indicator._draw
+    monkeypatch.setattr(indicator, "_draw", lambda x, y, curve: drawn.append(curve) or draw(x, y, curve))
+    indicator.timer.timeout.emit()
+    assert drawn == curves, "the shared timer didn't redraw every channel"
+    assert all(len(curve.xData) for curve in curves), "a channel wasn't drawn"
+    drawn.clear()
+    indicator.update()
+    assert not drawn, "the channels were redrawn without new samples"
+    series["pressure"].append(t[-1] + 1, 0)
+    indicator.update()
+    assert drawn == [curves[1]], "only the channel with new samples should be redrawn"
+
+
+def test_heatmap_skips_queued_and_text(qtbot, pulse_results):
+    widget = HeatmapPlotWidget(Pulse.DATA_COLUMNS, x_axes=["attenuation"], y_axes=["frequency1"])
+    qtbot.addWidget(widget)
+    queued, finished = pulse_results(), pulse_results()
+    finished.procedure.status = Procedure.FINISHED
+    for results, value in ((queued, 1.), (finished, 2.)):
+        results.append({"phase 1": [value], "frequency": ["high"]})
+        widget.addItem(widget.new_curve(results)[0])
+    queued_curve, finished_curve = widget.curves
+    assert queued_curve not in widget.grid, "the experiment that hasn't started was added to the map"
+    assert finished_curve in widget.grid, "the finished experiment wasn't added to the map"
+    widget.update_value(Pulse.DATA_COLUMNS.index("frequency"))  # a column of text
+    assert np.isnan(finished_curve._cell[2]), "a text result should leave the cell empty"
+
+
+def test_parameter_trend_one_row_per_experiment(qtbot, pulse_results):
+    widget = ParameterTrendWidget(Pulse.DATA_COLUMNS, x_axes=[["phase 1"], ["amplitude 1"]],
+                                  x_label=["phase", "amplitude"])
+    qtbot.addWidget(widget)
+    experiments = []
+    for value in (1., 3.):
+        results = pulse_results()
+        results.append({"phase 1": [value], "amplitude 1": [value + 1]})
+        experiments.append(widget.new_curve(results))
+    for curves in experiments + experiments[:1]:  # the first experiment is shown again
+        for curve in curves:
+            widget.addItem(curve)
+    assert len(widget.table) == 2, "the curves of an experiment should share its row"
+    assert np.array_equal(widget.table.column("phase 1"), [1, 3]), "the rows have the wrong values"
+    assert np.array_equal(widget.table.column("amplitude 1"), [2, 4]), "the rows have the wrong values"
+    widget.remove_curves(experiments[0])
+    assert np.array_equal(widget.table.column("phase 1"), [3]), "the row of the removed experiment is still there"